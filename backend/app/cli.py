@@ -5,6 +5,8 @@ from datetime import datetime
 
 from app.core.pipeline import run_pipeline
 from app.models.database import init_db, close_db
+from app.providers.factory import AIProviderFactory
+from app.utils.rate_limiter import RateLimitedClient
 from app.utils.logger import setup_logging, get_logger, set_run_id
 from app.config import settings
 
@@ -66,7 +68,9 @@ async def main_async(args):
         logger.error(f"Pipeline failed: {e}")
         raise
     finally:
-        # 关闭数据库连接
+        # 关闭共享的 HTTP 连接池和数据库连接
+        await AIProviderFactory.aclose_shared()
+        await RateLimitedClient.aclose_all()
         await close_db()
 
 
@@ -9,12 +9,12 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class RawNewsData:
     """
     采集器返回的原始数据结构
     
-    与数据库 RawItem 对应，但是纯数据类
+    与数据库 RawItem 对应，但是纯数据类（slots：去重批量较大时省去每个实例的 __dict__）
     """
     source: str  # finnhub | sec
     source_type: str  # news | filing
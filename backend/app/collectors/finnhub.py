@@ -20,19 +20,21 @@ class FinnhubClient(RateLimitedClient):
     base_url = "https://finnhub.io/api/v1"
     timeout = 30.0
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            api_key: Finnhub API key（默认取配置）
+            http_client: 外部注入的 HTTP 客户端（需自带 base_url，由调用方关闭；测试中配合 MockTransport）
+        """
         super().__init__()
         self.api_key = api_key or settings.finnhub_api_key
+        if http_client is not None:
+            self._client = http_client
+            self._owns_client = False
     
-    @property
-    def client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=self.timeout,
-                params={"token": self.api_key},
-            )
-        return self._client
+    async def get(self, path: str, params: Optional[dict] = None, **kwargs) -> httpx.Response:
+        """带 token 的 GET 请求（token 按请求传入，底层客户端与其他实例共享）"""
+        return await super().get(path, params={**(params or {}), "token": self.api_key}, **kwargs)
     
     async def get_company_news(
         self,
@@ -94,8 +96,8 @@ class FinnhubNewsCollector(BaseCollector):
     source_type = "news"
     credibility = "medium"
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = FinnhubClient(api_key)
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = FinnhubClient(api_key, http_client)
     
     async def collect(
         self,
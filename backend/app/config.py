@@ -97,9 +97,18 @@ class Settings(BaseSettings):
     gemini_rate_limit: int = 60
     openai_rate_limit: int = 60
     
+    # ===== Token Limits (tokens per minute) =====
+    gemini_tpm: int = 1_000_000
+    openai_tpm: int = 200_000
+    
+    # ===== Deduplication =====
+    # 标题相似度算法：simhash（64-bit 指纹汉明距离）| jaccard（词集合交并比，可选 numba / scipy 加速）
+    dedup_similarity_method: Literal["simhash", "jaccard"] = "simhash"
+    
     # ===== Paths =====
     watchlist_path: str = "data/watchlist.yaml"
     prompts_dir: str = "data/prompts"
+    cache_dir: str = "data/cache"  # 本地缓存（跨进程复用的小型元数据等）
     
     @property
     def current_ai_api_key(self) -> str:
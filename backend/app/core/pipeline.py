@@ -1,4 +1,5 @@
 """Pipeline 流水线 - 整合采集、处理、分析、输出"""
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 from uuid import UUID
@@ -21,7 +22,7 @@ from app.collectors.sec_edgar import SECFilingCollector
 from app.core.normalizer import DataProcessor
 from app.providers.factory import get_ai_provider
 from app.providers.base import AIAnalysisError
-from app.outputs.base import Digest, DigestItem, TickerSummary
+from app.outputs.base import Digest, DigestItem, TickerSummary, count_directions
 from app.outputs.notion import NotionOutput
 from app.outputs.markdown import MarkdownOutput
 from app.outputs.telegram import TelegramOutput
@@ -478,13 +479,10 @@ class Pipeline:
         summaries: Dict[str, TickerSummary] = {}
         
         # 按 ticker 分组
-        by_ticker: Dict[str, List[DigestItem]] = {}
+        by_ticker: Dict[str, List[DigestItem]] = defaultdict(list)
         for item in digest_items:
-            if item.news.tickers:
-                for ticker in item.news.tickers:
-                    if ticker not in by_ticker:
-                        by_ticker[ticker] = []
-                    by_ticker[ticker].append(item)
+            for ticker in item.news.tickers or ():
+                by_ticker[ticker].append(item)
         
         if not by_ticker:
             return summaries
@@ -499,8 +497,8 @@ class Pipeline:
             logger.warning(f"No AI provider for ticker summaries: {e}")
             # 无 AI 时返回基础统计
             for ticker, items in by_ticker.items():
-                bullish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bullish")
-                bearish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bearish")
+                counts = count_directions(items)
+                bullish, bearish = counts["bullish"], counts["bearish"]
                 neutral = len(items) - bullish - bearish
                 
                 summaries[ticker] = TickerSummary(
@@ -540,8 +538,8 @@ class Pipeline:
                     )
                     
                     # 统计情绪
-                    bullish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bullish")
-                    bearish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bearish")
+                    counts = count_directions(items)
+                    bullish, bearish = counts["bullish"], counts["bearish"]
                     neutral = len(items) - bullish - bearish
                     
                     summaries[ticker] = TickerSummary(
@@ -564,8 +562,8 @@ class Pipeline:
                 except Exception as e:
                     logger.warning(f"Failed to generate summary for {ticker}: {e}")
                     # 添加基础汇总
-                    bullish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bullish")
-                    bearish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bearish")
+                    counts = count_directions(items)
+                    bullish, bearish = counts["bullish"], counts["bearish"]
                     
                     summaries[ticker] = TickerSummary(
                         ticker=ticker,
@@ -8,6 +8,8 @@ from fastapi.responses import RedirectResponse
 from app.config import settings
 from app.utils.logger import setup_logging, get_logger
 from app.models.database import init_db
+from app.providers.factory import AIProviderFactory
+from app.utils.rate_limiter import RateLimitedClient
 
 
 logger = get_logger(__name__)
@@ -28,6 +30,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down NewsFeed API")
+    await AIProviderFactory.aclose_shared()
+    await RateLimitedClient.aclose_all()
 
 
 app = FastAPI(
@@ -75,7 +75,7 @@ class NewsItem(Base):
     canonical_url: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     title_normalized: Mapped[str] = mapped_column(String(500), nullable=True)  # 小写去标点
-    content_hash: Mapped[str] = mapped_column(String(64), nullable=True, index=True)  # SHA256
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True, index=True)  # 128-bit 内容哈希（十六进制）
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import List, Optional, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # ===== AI Analysis Output Schema (严格结构) =====
@@ -11,6 +11,9 @@ from pydantic import BaseModel, Field, field_validator
 class AIAnalysisOutput(BaseModel):
     """AI 必须输出的严格结构 - 用于 JSON 校验"""
     
+    # 校验后不可变，可在任务间共享 / 缓存；多余字段直接忽略（模型偶尔会附带额外字段）
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+    
     event_type: Literal[
         "earnings", "guidance", "regulatory", "contract",
         "product", "accident", "macro", "rumor", "other"
@@ -48,6 +51,17 @@ class AIAnalysisOutput(BaseModel):
         return str(v)[:50] if v else ""
 
 
+class TickerSummaryOutput(BaseModel):
+    """单只股票每日汇总的 AI 输出（缺失字段取默认值）"""
+    
+    overall_sentiment: str = "neutral"
+    summary: str = ""
+    key_events: List[str] = Field(default_factory=list)
+    thesis_impact: str = ""
+    action_suggestion: str = ""
+    risk_alerts: List[str] = Field(default_factory=list)
+
+
 # ===== Watchlist Schemas =====
 
 class WatchlistItemBase(BaseModel):
@@ -1,6 +1,8 @@
 """输出处理器抽象基类"""
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from collections import Counter, defaultdict
+from functools import cached_property
+from typing import List, Optional, Dict, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -10,6 +12,16 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+def truncate_text(text: str, limit: int = 60, suffix: str = "...") -> str:
+    """截断过长文本（超出 limit 时追加 suffix）"""
+    return text if len(text) <= limit else text[:limit] + suffix
+
+
+def count_directions(items: Iterable["DigestItem"]) -> Counter:
+    """统计 impact_direction 分布（未分析的条目不计入）"""
+    return Counter(item.analysis.impact_direction for item in items if item.analysis)
+
+
 @dataclass
 class DigestItem:
     """摘要中的单个新闻条目"""
@@ -42,6 +54,44 @@ class TickerSummary:
     neutral_count: int = 0
 
 
+@dataclass
+class DigestStats:
+    """Digest 的聚合统计（由 compute_digest_stats 一次遍历生成）"""
+    direction_counts: Counter
+    by_ticker: Dict[str, List[DigestItem]]
+    ticker_direction_counts: Dict[str, Counter]
+    high_impact: List[DigestItem]
+
+
+def compute_digest_stats(items: Iterable[DigestItem]) -> DigestStats:
+    """一次遍历 items，同时完成情绪计数、按 ticker 分组（含各 ticker 情绪计数）和高影响力筛选"""
+    direction_counts: Counter = Counter()
+    by_ticker: Dict[str, List[DigestItem]] = defaultdict(list)
+    ticker_direction_counts: Dict[str, Counter] = defaultdict(Counter)
+    high_impact: List[DigestItem] = []
+    
+    for item in items:
+        analysis = item.analysis
+        direction = None
+        if analysis:
+            direction = analysis.impact_direction
+            direction_counts[direction] += 1
+            if direction != "neutral":
+                high_impact.append(item)
+        
+        for ticker in item.news.tickers or ():
+            by_ticker[ticker].append(item)
+            if direction:
+                ticker_direction_counts[ticker][direction] += 1
+    
+    return DigestStats(
+        direction_counts=direction_counts,
+        by_ticker=dict(by_ticker),
+        ticker_direction_counts=ticker_direction_counts,
+        high_impact=high_impact,
+    )
+
+
 @dataclass
 class Digest:
     """每日摘要"""
@@ -60,25 +110,29 @@ class Digest:
     # 每只股票的汇总分析
     ticker_summaries: Dict[str, TickerSummary] = field(default_factory=dict)
     
+    @cached_property
+    def stats(self) -> DigestStats:
+        """单次遍历得到的聚合统计，首次访问后缓存"""
+        return compute_digest_stats(self.items)
+    
+    @property
+    def direction_counts(self) -> Counter:
+        """impact_direction 计数（bullish / bearish / neutral）"""
+        return self.stats.direction_counts
+    
     @property
     def high_impact_items(self) -> List[DigestItem]:
         """返回高影响力条目（利多或利空）"""
-        return [
-            item for item in self.items
-            if item.analysis and item.analysis.impact_direction != "neutral"
-        ]
+        return self.stats.high_impact
     
     @property
-    def by_ticker(self) -> dict:
+    def by_ticker(self) -> Dict[str, List[DigestItem]]:
         """按 ticker 分组"""
-        result = {}
-        for item in self.items:
-            if item.news.tickers:
-                for ticker in item.news.tickers:
-                    if ticker not in result:
-                        result[ticker] = []
-                    result[ticker].append(item)
-        return result
+        return self.stats.by_ticker
+    
+    def ticker_direction_counts(self, ticker: str) -> Counter:
+        """单只 ticker 的 impact_direction 计数（与 by_ticker 同一次遍历得到）"""
+        return self.stats.ticker_direction_counts.get(ticker, Counter())
 
 
 class OutputError(Exception):
@@ -1,5 +1,6 @@
 """Email 输出 - 发送每日摘要邮件"""
 import asyncio
+import heapq
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -9,12 +10,68 @@ from typing import Optional, List
 from datetime import datetime
 from pathlib import Path
 
-from app.outputs.base import BaseOutput, Digest, DigestItem
+from app.outputs.base import BaseOutput, Digest, DigestItem, truncate_text
 from app.config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# HTML 转义表（str.translate 单次扫描完成转义）
+_HTML_ESCAPE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+
+# 邮件 HTML 头部模板（含情绪横幅，正文卡片紧随其后）
+_EMAIL_HEADER_TMPL = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;background:#f9fafb;margin:0;padding:20px;">
+    <div style="max-width:600px;margin:0 auto;background:white;border-radius:8px;overflow:hidden;box-shadow:0 1px 3px rgba(0,0,0,0.1);">
+        
+        <!-- Header -->
+        <div style="background:linear-gradient(135deg,#1e3a5f 0%,#0f172a 100%);color:white;padding:24px;text-align:center;">
+            <h1 style="margin:0;font-size:24px;font-weight:600;">📰 股票新闻日报</h1>
+            <p style="margin:8px 0 0 0;opacity:0.8;font-size:14px;">{generated_at}</p>
+        </div>
+        
+        <!-- Sentiment Banner -->
+        <div style="background:{sentiment_color};color:white;padding:16px;text-align:center;">
+            <div style="font-size:18px;font-weight:bold;">市场情绪: {sentiment_text}</div>
+            <div style="font-size:14px;margin-top:4px;opacity:0.9;">
+                📈 利好 {bullish} | 📉 利空 {bearish} | ➖ 中性 {neutral}
+            </div>
+        </div>
+        
+        <!-- Content -->
+        <div style="padding:20px;">
+            <h2 style="font-size:18px;color:#1f2937;margin:0 0 16px 0;padding-bottom:8px;border-bottom:2px solid #e5e7eb;">
+                📊 各股分析
+            </h2>
+            '''
+
+# 邮件 HTML 尾部（无变量，直接复用）
+_EMAIL_FOOTER_HTML = '''
+        </div>
+        
+        <!-- Footer -->
+        <div style="background:#f3f4f6;padding:16px;text-align:center;font-size:12px;color:#6b7280;">
+            <p style="margin:0;">由 NewsFeed AI 自动生成</p>
+            <p style="margin:4px 0 0 0;">数据来源: Finnhub, SEC EDGAR | 分析: Gemini AI</p>
+        </div>
+        
+    </div>
+</body>
+</html>
+'''
+
 
 class EmailOutput(BaseOutput):
     """
@@ -66,8 +123,8 @@ class EmailOutput(BaseOutput):
     def _format_html_email(self, digest: Digest) -> str:
         """生成 HTML 格式的邮件内容"""
         # 统计
-        bullish = sum(1 for item in digest.items if item.analysis and item.analysis.impact_direction == "bullish")
-        bearish = sum(1 for item in digest.items if item.analysis and item.analysis.impact_direction == "bearish")
+        counts = digest.direction_counts
+        bullish, bearish = counts["bullish"], counts["bearish"]
         neutral = len(digest.items) - bullish - bearish
         
         # 确定整体情绪
@@ -81,19 +138,12 @@ class EmailOutput(BaseOutput):
             sentiment_color = "#6b7280"
             sentiment_text = "中性 NEUTRAL"
         
-        # 按 ticker 分组
-        ticker_items: dict = {}
-        for item in digest.items:
-            for ticker in item.news.tickers:
-                if ticker not in ticker_items:
-                    ticker_items[ticker] = []
-                ticker_items[ticker].append(item)
-        
-        # 生成 ticker 卡片
+        # 生成 ticker 卡片（只为新闻最多的 10 只股票构建）
         ticker_cards = []
-        for ticker, items in ticker_items.items():
-            t_bullish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bullish")
-            t_bearish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bearish")
+        top_tickers = heapq.nlargest(10, digest.by_ticker.items(), key=lambda kv: len(kv[1]))
+        for ticker, items in top_tickers:
+            t_counts = digest.ticker_direction_counts(ticker)
+            t_bullish, t_bearish = t_counts["bullish"], t_counts["bearish"]
             
             if t_bullish > t_bearish:
                 card_color = "#dcfce7"
@@ -109,13 +159,13 @@ class EmailOutput(BaseOutput):
             ai_summary = ""
             if ticker in digest.ticker_summaries:
                 ts = digest.ticker_summaries[ticker]
-                ai_summary = f'<p style="color:#4b5563;font-size:13px;margin:8px 0 0 0;">{ts.summary}</p>'
+                ai_summary = f'<p style="color:#4b5563;font-size:13px;margin:8px 0 0 0;">{ts.summary.translate(_HTML_ESCAPE)}</p>'
             
             # 新闻列表
             news_list = ""
             for item in items[:3]:  # 最多显示3条
                 direction_icon = "📈" if item.analysis and item.analysis.impact_direction == "bullish" else "📉" if item.analysis and item.analysis.impact_direction == "bearish" else "➖"
-                news_list += f'<li style="margin:4px 0;">{direction_icon} {item.news.title[:60]}{"..." if len(item.news.title) > 60 else ""}</li>'
+                news_list += f'<li style="margin:4px 0;">{direction_icon} {truncate_text(item.news.title).translate(_HTML_ESCAPE)}</li>'
             
             card = f'''
             <div style="background:{card_color};border-left:4px solid {border_color};padding:12px 16px;margin:12px 0;border-radius:4px;">
@@ -127,57 +177,26 @@ class EmailOutput(BaseOutput):
             '''
             ticker_cards.append(card)
         
-        html = f'''
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;background:#f9fafb;margin:0;padding:20px;">
-    <div style="max-width:600px;margin:0 auto;background:white;border-radius:8px;overflow:hidden;box-shadow:0 1px 3px rgba(0,0,0,0.1);">
-        
-        <!-- Header -->
-        <div style="background:linear-gradient(135deg,#1e3a5f 0%,#0f172a 100%);color:white;padding:24px;text-align:center;">
-            <h1 style="margin:0;font-size:24px;font-weight:600;">📰 股票新闻日报</h1>
-            <p style="margin:8px 0 0 0;opacity:0.8;font-size:14px;">{digest.generated_at.strftime('%Y年%m月%d日 %H:%M')}</p>
-        </div>
-        
-        <!-- Sentiment Banner -->
-        <div style="background:{sentiment_color};color:white;padding:16px;text-align:center;">
-            <div style="font-size:18px;font-weight:bold;">市场情绪: {sentiment_text}</div>
-            <div style="font-size:14px;margin-top:4px;opacity:0.9;">
-                📈 利好 {bullish} | 📉 利空 {bearish} | ➖ 中性 {neutral}
-            </div>
-        </div>
-        
-        <!-- Content -->
-        <div style="padding:20px;">
-            <h2 style="font-size:18px;color:#1f2937;margin:0 0 16px 0;padding-bottom:8px;border-bottom:2px solid #e5e7eb;">
-                📊 各股分析
-            </h2>
-            {''.join(ticker_cards[:10])}
-        </div>
-        
-        <!-- Footer -->
-        <div style="background:#f3f4f6;padding:16px;text-align:center;font-size:12px;color:#6b7280;">
-            <p style="margin:0;">由 NewsFeed AI 自动生成</p>
-            <p style="margin:4px 0 0 0;">数据来源: Finnhub, SEC EDGAR | 分析: Gemini AI</p>
-        </div>
-        
-    </div>
-</body>
-</html>
-'''
-        return html
+        return "".join([
+            _EMAIL_HEADER_TMPL.format(
+                generated_at=digest.generated_at.strftime('%Y年%m月%d日 %H:%M'),
+                sentiment_color=sentiment_color,
+                sentiment_text=sentiment_text,
+                bullish=bullish,
+                bearish=bearish,
+                neutral=neutral,
+            ),
+            "".join(ticker_cards),
+            _EMAIL_FOOTER_HTML,
+        ])
     
-    async def _send_email(
+    def _build_message(
         self,
         subject: str,
         html_content: str,
         attachments: Optional[List[Path]] = None
-    ) -> bool:
-        """发送邮件"""
+    ) -> bytes:
+        """构建邮件并序列化为 bytes（只编码一次）"""
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
         msg['From'] = self.smtp_user
@@ -204,7 +223,10 @@ class EmailOutput(BaseOutput):
                     except Exception as e:
                         logger.warning(f"Failed to attach file {file_path}: {e}")
         
-        # 发送邮件
+        return msg.as_bytes()
+    
+    async def _send_email(self, message: bytes) -> bool:
+        """发送已序列化的邮件"""
         def _send():
             try:
                 if self.smtp_port == 465:
@@ -216,7 +238,7 @@ class EmailOutput(BaseOutput):
                     server.starttls()
                 
                 server.login(self.smtp_user, self.smtp_password)
-                server.sendmail(self.smtp_user, self.email_to, msg.as_string())
+                server.sendmail(self.smtp_user, self.email_to, message)
                 server.quit()
                 return True
             except Exception as e:
@@ -243,7 +265,9 @@ class EmailOutput(BaseOutput):
             if md_files:
                 attachments.append(md_files[0])
         
-        success = await self._send_email(subject, html_content, attachments)
+        message = self._build_message(subject, html_content, attachments)
+        
+        success = await self._send_email(message)
         
         if success:
             logger.info("✅ Email sent successfully")
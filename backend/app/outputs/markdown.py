@@ -1,14 +1,64 @@
 """Markdown 文件输出 - 本地保存摘要（支持 K 线图和美化格式）"""
-from typing import Optional, Dict, Set, List
+import os
+from typing import Optional, Dict, Set, List, Protocol
 from datetime import datetime
 from pathlib import Path
 
-from app.outputs.base import BaseOutput, Digest, DigestItem, OutputError
+from app.outputs.base import BaseOutput, Digest, DigestItem, OutputError, truncate_text
+from app.utils.files import atomic_replace
 from app.utils.logger import get_logger
 from app.config import settings
 
 logger = get_logger(__name__)
 
+# "View All News Items" 表格行模板（含行首换行）
+_ALL_ITEMS_ROW_TMPL = "\n| %s | %s | %s | %s |"
+
+
+class _TextWriter(Protocol):
+    """_build_markdown 的输出目标（文本文件、StringIO 或 _GatherWriter）"""
+    
+    def write(self, text: str) -> int: ...
+
+
+class _GatherWriter:
+    """
+    聚集写入器
+    
+    累积 UTF-8 编码后的片段，达到阈值后通过 os.writev 一次系统调用写出，
+    省去 join 出完整字符串的额外拷贝；不支持 writev 的平台（Windows）退回 os.write。
+    """
+    
+    IOV_MAX = 1024
+    
+    def __init__(self, fd: int, flush_bytes: int = 1 << 16):
+        self._fd = fd
+        self._flush_bytes = flush_bytes
+        self._chunks: List[bytes] = []
+        self._size = 0
+    
+    def write(self, text: str) -> int:
+        chunk = text.encode("utf-8")
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self._flush_bytes or len(self._chunks) >= self.IOV_MAX:
+            self.flush()
+        return len(text)
+    
+    def flush(self):
+        if not self._chunks:
+            return
+        
+        written = os.writev(self._fd, self._chunks) if hasattr(os, "writev") else 0
+        if written < self._size:
+            # 部分写入或无 writev：剩余部分逐段写完
+            rest = memoryview(b"".join(self._chunks))[written:]
+            while rest:
+                rest = rest[os.write(self._fd, rest):]
+        
+        self._chunks.clear()
+        self._size = 0
+
 
 class MarkdownOutput(BaseOutput):
     """
@@ -64,26 +114,24 @@ class MarkdownOutput(BaseOutput):
                 chart_gen = self._get_chart_generator()
                 if chart_gen:
                     logger.info(f"Generating charts for {len(tickers)} tickers...")
-                    for ticker in sorted(tickers):
-                        try:
-                            path = chart_gen.generate_price_chart(ticker, self.chart_days)
-                            if path:
-                                # 使用相对于 Markdown 文件所在目录的路径
-                                chart_path = Path(path)
-                                try:
-                                    rel_path = chart_path.relative_to(self.output_dir)
-                                except ValueError:
-                                    # 如果无法计算相对路径，使用文件名
-                                    rel_path = Path("charts") / chart_path.name
-                                chart_paths[ticker] = str(rel_path).replace("\\", "/")
-                        except Exception as e:
-                            logger.warning(f"Failed to generate chart for {ticker}: {e}")
-            
-            # 生成 Markdown 内容
-            content = self._build_markdown(digest, chart_paths)
+                    generated = await chart_gen.agenerate_batch_charts(sorted(tickers), self.chart_days)
+                    for ticker, path in generated.items():
+                        if path:
+                            # 使用相对于 Markdown 文件所在目录的路径
+                            chart_path = Path(path)
+                            try:
+                                rel_path = chart_path.relative_to(self.output_dir)
+                            except ValueError:
+                                # 如果无法计算相对路径，使用文件名
+                                rel_path = Path("charts") / chart_path.name
+                            chart_paths[ticker] = str(rel_path).replace("\\", "/")
             
-            # 写入文件
-            filepath.write_text(content, encoding="utf-8")
+            # 生成 Markdown 内容并直接写入文件（大表格逐行写出，不在内存中拼接）；
+            # 先写同目录临时文件，成功后原子替换，中途失败不会留下半份摘要
+            with atomic_replace(filepath) as fd:
+                writer = _GatherWriter(fd)
+                self._build_markdown(digest, writer, chart_paths)
+                writer.flush()
             
             logger.info(f"Digest saved to {filepath}", items=len(digest.items))
             
@@ -93,13 +141,21 @@ class MarkdownOutput(BaseOutput):
             logger.error(f"Failed to save digest: {e}")
             raise OutputError(f"Markdown output failed: {e}")
     
-    def _build_markdown(self, digest: Digest, chart_paths: Dict[str, str] = None) -> str:
-        """构建美化的 Markdown 内容"""
+    def _build_markdown(
+        self,
+        digest: Digest,
+        out: _TextWriter,
+        chart_paths: Dict[str, str] = None
+    ) -> None:
+        """构建美化的 Markdown 内容并写入 out"""
         chart_paths = chart_paths or {}
         lines = []
         
-        date_str = digest.generated_at.strftime("%Y-%m-%d")
-        time_str = digest.generated_at.strftime("%H:%M UTC")
+        # generated_at 的各种格式在入口处一次性生成
+        generated_at = digest.generated_at
+        date_str = generated_at.strftime("%Y-%m-%d")
+        time_str = generated_at.strftime("%H:%M UTC")
+        footer_ts = generated_at.strftime("%Y-%m-%d %H:%M:%S UTC")
         
         # ===== 头部 =====
         lines.append(f"# 📰 Daily Stock News Digest")
@@ -109,9 +165,8 @@ class MarkdownOutput(BaseOutput):
         lines.append("")
         
         # ===== 情绪仪表盘 =====
-        bullish = sum(1 for i in digest.items if i.analysis and i.analysis.impact_direction == "bullish")
-        bearish = sum(1 for i in digest.items if i.analysis and i.analysis.impact_direction == "bearish")
-        neutral = sum(1 for i in digest.items if i.analysis and i.analysis.impact_direction == "neutral")
+        counts = digest.direction_counts
+        bullish, bearish, neutral = counts["bullish"], counts["bearish"], counts["neutral"]
         total = bullish + bearish + neutral
         
         # 计算情绪分数
@@ -189,25 +244,27 @@ class MarkdownOutput(BaseOutput):
         lines.append("")
         lines.append("| Time | Ticker | Impact | Title |")
         lines.append("|:-----|:-------|:------:|:------|")
+        out.write("\n".join(lines))
         
+        # 完整列表行数随新闻数量增长，逐行写出
         for item in sorted(digest.items, key=lambda x: x.news.published_at, reverse=True):
-            time_str = item.news.published_at.strftime("%H:%M")
+            row_time = item.news.published_at.strftime("%H:%M")
             tickers = ", ".join(item.news.tickers) if item.news.tickers else "-"
             impact = "📈" if item.analysis and item.analysis.impact_direction == "bullish" else \
                      "📉" if item.analysis and item.analysis.impact_direction == "bearish" else "➖"
-            title = item.news.title[:60] + "..." if len(item.news.title) > 60 else item.news.title
-            lines.append(f"| {time_str} | {tickers} | {impact} | {title} |")
+            title = truncate_text(item.news.title)
+            out.write(_ALL_ITEMS_ROW_TMPL % (row_time, tickers, impact, title))
         
+        lines = [""]  # 衔接表格最后一行的换行
         lines.append("")
         lines.append("</details>")
         lines.append("")
         lines.append("---")
         lines.append("")
-        lines.append(f"*🤖 Generated by NewsFeed AI | {digest.generated_at.strftime('%Y-%m-%d %H:%M:%S UTC')}*")
+        lines.append(f"*🤖 Generated by NewsFeed AI | {footer_ts}*")
         lines.append("")
         lines.append("*Data sources: Finnhub, SEC EDGAR | Analysis: Gemini AI*")
-        
-        return "\n".join(lines)
+        out.write("\n".join(lines))
     
     def _format_top_story(self, item: DigestItem, index: int) -> List[str]:
         """格式化头条新闻"""
@@ -1,9 +1,19 @@
 """Notion 输出处理器 - 批量写入 + 节流"""
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Iterable, Iterator, Tuple
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+from pathlib import Path
 import asyncio
+import heapq
+import json
+import random
+
+import httpx
 
 from app.outputs.base import BaseOutput, Digest, DigestItem, OutputError
+from app.utils.files import atomic_write_text
 from app.utils.rate_limiter import rate_limiter, RateLimitedClient
 from app.utils.logger import get_logger
 from app.config import settings
@@ -13,11 +23,41 @@ logger = get_logger(__name__)
 # 延迟导入 Notion SDK
 try:
     from notion_client import AsyncClient as NotionAsyncClient
+    from notion_client import APIResponseError
     NOTION_AVAILABLE = True
 except ImportError:
     NOTION_AVAILABLE = False
     logger.warning("notion-client not installed, Notion output unavailable")
 
+# HTTP/2 需要 h2 包，未安装时回退到 HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# impact_direction -> 标题行图标
+_IMPACT_EMOJI = {"bullish": "📈", "bearish": "📉", "neutral": "➖"}
+
+# 固定结构的 block 直接复用同一个 dict（SDK 只做 JSON 序列化，不会修改它们）
+_DIVIDER_BLOCK: Dict[str, Any] = {"object": "block", "type": "divider", "divider": {}}
+
+
+def _text_block(block_type: str, text: str) -> Dict[str, Any]:
+    """纯文本 block 的统一结构（paragraph / bulleted_list_item / heading_N）"""
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": [{"type": "text", "text": {"content": text}}]}
+    }
+
+
+@lru_cache(maxsize=128)
+def _heading_block(level: int, text: str) -> Dict[str, Any]:
+    """标题 block（标题文本大多固定，按 (level, text) 缓存）"""
+    return _text_block(f"heading_{level}", text)
+
 
 class NotionOutput(BaseOutput):
     """
@@ -37,6 +77,15 @@ class NotionOutput(BaseOutput):
     
     name = "notion"
     
+    # "News by Ticker" 部分最多渲染的股票数
+    MAX_TICKERS_RENDERED = 20
+    
+    # Title 属性名缓存文件（位于 settings.cache_dir，按 database_id 索引）
+    TITLE_CACHE_FILE = "notion_title_property.json"
+    
+    # 429 (rate_limited) 的最大重试次数；SDK 抛 APIResponseError，不经过 rate_limiter 的重试
+    MAX_RATE_LIMIT_RETRIES = 3
+    
     def __init__(
         self,
         token: Optional[str] = None,
@@ -53,8 +102,16 @@ class NotionOutput(BaseOutput):
         if not self.database_id:
             raise OutputError("Notion database ID not configured")
         
-        self._client = NotionAsyncClient(auth=self.token)
-        self._title_property = None  # Will be detected on first use
+        # 共享连接池：pages.create 与后续 blocks.children.append 复用同一条 TCP/TLS 连接
+        self._http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+            timeout=30.0
+        )
+        self._client = NotionAsyncClient(auth=self.token, client=self._http_client)
+        # 优先读取本地缓存，缓存未命中时在首次使用时检测
+        self._title_property = self._load_cached_title_property()
+        self._title_from_cache = self._title_property is not None
         
         logger.info("NotionOutput initialized")
     
@@ -72,11 +129,29 @@ class NotionOutput(BaseOutput):
             # 构建 Page 属性
             properties = self._build_properties(digest)
             
-            # 构建 Page 内容 (blocks)
-            children = self._build_content_blocks(digest)
+            # 构建 Page 内容 (blocks)，按 100 个一批惰性生成
+            batches = self._iter_block_batches(digest)
             
             # 创建 Page（使用限流）
-            page = await self._create_page(properties, children)
+            try:
+                page = await self._create_page(properties, batches)
+            except APIResponseError as e:
+                # 缓存的 Title 属性名可能已过期（数据库中属性被改名）：丢弃缓存、重新检测后重试一次
+                stale = self._title_property
+                if e.code != "validation_error" or not self._title_from_cache:
+                    raise
+                self._title_from_cache = False
+                self._drop_cached_title_property()
+                await self._detect_title_property()
+                if self._title_property == stale:
+                    raise
+                logger.warning(
+                    "Cached title property is stale, retrying",
+                    cached=stale,
+                    detected=self._title_property
+                )
+                properties = self._build_properties(digest)
+                page = await self._create_page(properties, self._iter_block_batches(digest))
             
             page_id = page["id"]
             logger.info(
@@ -102,6 +177,7 @@ class NotionOutput(BaseOutput):
                 if prop.get("type") == "title":
                     self._title_property = name
                     logger.info(f"Detected title property: {name}")
+                    self._save_cached_title_property(name)
                     return
             
             # 如果没找到，默认使用 "Name"
@@ -112,27 +188,78 @@ class NotionOutput(BaseOutput):
             logger.warning(f"Failed to detect title property: {e}, using 'Name'")
             self._title_property = "Name"
     
+    def _title_cache_path(self) -> Path:
+        return Path(settings.cache_dir) / self.TITLE_CACHE_FILE
+    
+    def _load_cached_title_property(self) -> Optional[str]:
+        """从本地缓存读取该数据库的 Title 属性名"""
+        try:
+            cache = json.loads(self._title_cache_path().read_text(encoding="utf-8"))
+            return cache.get(self.database_id)
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    def _save_cached_title_property(self, name: str):
+        """写回本地缓存（失败不影响投递）"""
+        self._update_title_cache(name)
+    
+    def _drop_cached_title_property(self):
+        """删除该数据库的缓存条目（属性名已失效）"""
+        self._update_title_cache(None)
+    
+    def _update_title_cache(self, name: Optional[str]):
+        """读取-修改-写回缓存文件；name 为 None 时删除该数据库的条目"""
+        path = self._title_cache_path()
+        try:
+            try:
+                cache = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                cache = {}
+            if name is None:
+                if cache.pop(self.database_id, None) is None:
+                    return
+            else:
+                cache[self.database_id] = name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(path, json.dumps(cache, ensure_ascii=False))
+        except OSError as e:
+            logger.debug(f"Failed to cache title property: {e}")
+    
     async def _create_page(
         self,
         properties: Dict[str, Any],
-        children: List[Dict[str, Any]]
+        batches: Iterator[List[Dict[str, Any]]]
     ) -> Dict[str, Any]:
-        """创建 Notion Page（带限流）"""
+        """创建 Notion Page（带限流），剩余批次依次追加"""
+        first_batch = next(batches, [])
+        
         async def _do_create():
             return await self._client.pages.create(
                 parent={"database_id": self.database_id},
                 properties=properties,
-                children=children[:100]  # Notion 限制单次最多 100 个 blocks
+                children=first_batch  # Notion 限制单次最多 100 个 blocks
             )
         
-        page = await rate_limiter.execute("notion", _do_create)
+        page = await self._execute_with_retry(_do_create)
         
         # 如果内容超过 100 blocks，追加剩余内容
-        if len(children) > 100:
-            page_id = page["id"]
-            for i in range(100, len(children), 100):
-                batch = children[i:i+100]
-                await self._append_blocks(page_id, batch)
+        # 注意：append 总是追加到页面末尾，按请求到达顺序生效；
+        # 并发发送会打乱批次顺序，因此同一时刻只允许一个 append 在途，
+        # 在途期间构建下一批 blocks
+        page_id = page["id"]
+        pending: Optional[asyncio.Task] = None
+        try:
+            for batch in batches:
+                if pending:
+                    await pending
+                pending = asyncio.create_task(self._append_blocks(page_id, batch))
+                await asyncio.sleep(0)  # 让请求先发出，再构建下一批
+            if pending:
+                await pending
+        except BaseException:
+            if pending and not pending.done():
+                pending.cancel()
+            raise
         
         return page
     
@@ -144,27 +271,44 @@ class NotionOutput(BaseOutput):
                 children=blocks
             )
         
-        await rate_limiter.execute("notion", _do_append)
+        await self._execute_with_retry(_do_append)
+    
+    async def _execute_with_retry(self, func):
+        """限流执行 Notion 调用；遇到 rate_limited 按 Retry-After + jitter 等待后重试"""
+        for attempt in range(self.MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                return await rate_limiter.execute("notion", func)
+            except APIResponseError as e:
+                if e.code != "rate_limited" or attempt >= self.MAX_RATE_LIMIT_RETRIES:
+                    raise
+                try:
+                    retry_after = float(e.headers.get("retry-after", 2 ** attempt))
+                except ValueError:
+                    retry_after = 2 ** attempt
+                # jitter：多实例同时被限流时错开重试时间
+                wait_time = min(retry_after + random.uniform(0, 0.5), 60.0)
+                logger.warning(
+                    "Notion rate limited, retrying",
+                    attempt=attempt + 1,
+                    wait_seconds=wait_time
+                )
+                await asyncio.sleep(wait_time)
     
     def _build_properties(self, digest: Digest) -> Dict[str, Any]:
         """构建 Page 属性"""
         date_str = digest.generated_at.strftime("%Y-%m-%d")
         
         # 统计摘要
-        bullish_count = sum(
-            1 for item in digest.items
-            if item.analysis and item.analysis.impact_direction == "bullish"
-        )
-        bearish_count = sum(
-            1 for item in digest.items
-            if item.analysis and item.analysis.impact_direction == "bearish"
-        )
+        counts = digest.direction_counts
+        bullish_count = counts["bullish"]
+        bearish_count = counts["bearish"]
         
-        title = f"📰 Daily Digest - {date_str}"
+        title_parts = [f"📰 Daily Digest - {date_str}"]
         if bullish_count > 0:
-            title += f" | 📈 {bullish_count}"
+            title_parts.append(f"📈 {bullish_count}")
         if bearish_count > 0:
-            title += f" | 📉 {bearish_count}"
+            title_parts.append(f"📉 {bearish_count}")
+        title = " | ".join(title_parts)
         
         # 使用检测到的 Title 属性名
         title_prop = self._title_property or "Name"
@@ -180,160 +324,157 @@ class NotionOutput(BaseOutput):
             # "Bearish": {"number": bearish_count},
         }
     
-    def _build_content_blocks(self, digest: Digest) -> List[Dict[str, Any]]:
-        """构建 Page 内容 blocks"""
-        blocks = []
+    def _iter_block_batches(self, digest: Digest) -> Iterator[List[Dict[str, Any]]]:
+        """按 Notion 单次上限（100 个）分批惰性产出 blocks"""
+        blocks = self._iter_content_blocks(digest)
+        while batch := list(islice(blocks, 100)):
+            yield batch
+    
+    def _iter_content_blocks(self, digest: Digest) -> Iterator[Dict[str, Any]]:
+        """按页面顺序逐个产出 Page 内容 blocks"""
+        items = digest.items
+        high_impact = digest.high_impact_items
+        by_ticker = digest.by_ticker
+        item_cache: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
         
         # 标题和概览
-        blocks.append(self._heading_1("📊 Daily Market News Digest"))
+        yield self._heading_1("📊 Daily Market News Digest")
         
-        blocks.append(self._paragraph(
+        yield self._paragraph(
             f"Generated: {digest.generated_at.strftime('%Y-%m-%d %H:%M UTC')} | "
             f"Window: {digest.window_start.strftime('%m/%d %H:%M')} - {digest.window_end.strftime('%m/%d %H:%M')} | "
-            f"Items: {len(digest.items)}"
-        ))
+            f"Items: {len(items)}"
+        )
         
-        blocks.append(self._divider())
+        yield self._divider()
         
         # 高影响力新闻
-        high_impact = digest.high_impact_items
         if high_impact:
-            blocks.append(self._heading_2("🔥 High Impact News"))
+            yield self._heading_2("🔥 High Impact News")
             
             for item in high_impact[:5]:  # 最多显示 5 条
-                blocks.extend(self._build_news_item_blocks(item, show_detail=True))
+                yield from self._build_news_item_blocks(item, show_detail=True, cache=item_cache)
             
-            blocks.append(self._divider())
+            yield self._divider()
         
         # 按 Ticker 分组
-        by_ticker = digest.by_ticker
         if by_ticker:
-            blocks.append(self._heading_2("📈 News by Ticker"))
+            yield self._heading_2("📈 News by Ticker")
             
-            for ticker, items in sorted(by_ticker.items()):
-                blocks.append(self._heading_3(f"${ticker}"))
+            # 按字母序取前 MAX_TICKERS_RENDERED 只，避免对全部 ticker 排序
+            top_tickers = heapq.nsmallest(
+                self.MAX_TICKERS_RENDERED, by_ticker.items(), key=itemgetter(0)
+            )
+            for ticker, ticker_items in top_tickers:
+                yield self._heading_3(f"${ticker}")
                 
-                for item in items[:3]:  # 每个 ticker 最多 3 条
-                    blocks.extend(self._build_news_item_blocks(item, show_detail=False))
+                for item in ticker_items[:3]:  # 每个 ticker 最多 3 条
+                    yield from self._build_news_item_blocks(item, show_detail=False, cache=item_cache)
         
         # 完整列表
-        if len(digest.items) > 10:
-            blocks.append(self._divider())
-            blocks.append(self._heading_2("📋 All News Items"))
-            blocks.append(self._toggle(
-                f"View all {len(digest.items)} items",
-                [self._build_news_item_blocks(item, show_detail=False) for item in digest.items]
-            ))
-        
-        return blocks
+        if len(items) > 10:
+            yield self._divider()
+            yield self._heading_2("📋 All News Items")
+            yield self._toggle_nested(
+                f"View all {len(items)} items",
+                (self._build_news_item_blocks(item, show_detail=False, cache=item_cache) for item in items)
+            )
     
     def _build_news_item_blocks(
         self,
         item: DigestItem,
-        show_detail: bool = False
+        show_detail: bool = False,
+        cache: Optional[Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]]] = None
     ) -> List[Dict[str, Any]]:
-        """构建单条新闻的 blocks"""
-        blocks = []
+        """
+        构建单条新闻的 blocks
+        
+        同一条新闻可能同时出现在多个部分（高影响力 / 按 Ticker / 完整列表），
+        传入 cache 时其标题行和链接行只构建一次，各部分共享同一 block 对象。
+        """
+        key = id(item)
+        core = cache.get(key) if cache is not None else None
+        if core is None:
+            core = self._build_news_item_core_blocks(item)
+            if cache is not None:
+                cache[key] = core
+        
+        bullet, link = core
+        analysis = item.analysis
+        if not (show_detail and analysis):
+            return [bullet, link]
+        
+        # 分析详情
+        detail_lines = [
+            f"Type: {analysis.event_type} | Impact: {analysis.impact_direction} ({analysis.impact_horizon})",
+            f"Summary: {analysis.summary}",
+        ]
+        
+        if analysis.key_facts:
+            detail_lines.append(f"Facts: {'; '.join(analysis.key_facts)}")
         
+        if analysis.watch_next:
+            detail_lines.append(f"Watch: {analysis.watch_next}")
+        
+        return [bullet, *(self._paragraph(f"  {line}") for line in detail_lines), link]
+    
+    def _build_news_item_core_blocks(
+        self,
+        item: DigestItem
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """构建单条新闻的标题行和链接行 blocks"""
         news = item.news
         analysis = item.analysis
         
         # 标题行
         tickers_str = ", ".join(f"${t}" for t in news.tickers) if news.tickers else ""
         
-        impact_emoji = ""
-        if analysis:
-            impact_map = {"bullish": "📈", "bearish": "📉", "neutral": "➖"}
-            impact_emoji = impact_map.get(analysis.impact_direction, "")
+        impact_emoji = _IMPACT_EMOJI.get(analysis.impact_direction, "") if analysis else ""
         
         title_text = f"{impact_emoji} **{news.title}**"
         if tickers_str:
             title_text = f"{tickers_str} | {title_text}"
         
-        blocks.append(self._bullet(title_text))
-        
-        if show_detail and analysis:
-            # 分析详情
-            detail_lines = [
-                f"Type: {analysis.event_type} | Impact: {analysis.impact_direction} ({analysis.impact_horizon})",
-                f"Summary: {analysis.summary}",
-            ]
-            
-            if analysis.key_facts:
-                detail_lines.append(f"Facts: {'; '.join(analysis.key_facts)}")
-            
-            if analysis.watch_next:
-                detail_lines.append(f"Watch: {analysis.watch_next}")
-            
-            for line in detail_lines:
-                blocks.append(self._paragraph(f"  {line}"))
-        
         # 链接
-        blocks.append(self._paragraph(
-            f"  [{news.source}]({news.canonical_url}) | {news.published_at.strftime('%m/%d %H:%M')}"
-        ))
+        link_text = f"  [{news.source}]({news.canonical_url}) | {news.published_at.strftime('%m/%d %H:%M')}"
         
-        return blocks
+        return self._bullet(title_text), self._paragraph(link_text)
     
     # ===== Notion Block Builders =====
     
     def _heading_1(self, text: str) -> Dict[str, Any]:
-        return {
-            "object": "block",
-            "type": "heading_1",
-            "heading_1": {"rich_text": [{"type": "text", "text": {"content": text}}]}
-        }
+        return _heading_block(1, text)
     
     def _heading_2(self, text: str) -> Dict[str, Any]:
-        return {
-            "object": "block",
-            "type": "heading_2",
-            "heading_2": {"rich_text": [{"type": "text", "text": {"content": text}}]}
-        }
+        return _heading_block(2, text)
     
     def _heading_3(self, text: str) -> Dict[str, Any]:
-        return {
-            "object": "block",
-            "type": "heading_3",
-            "heading_3": {"rich_text": [{"type": "text", "text": {"content": text}}]}
-        }
+        return _heading_block(3, text)
     
     def _paragraph(self, text: str) -> Dict[str, Any]:
-        return {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": text}}]}
-        }
+        return _text_block("paragraph", text)
     
     def _bullet(self, text: str) -> Dict[str, Any]:
-        return {
-            "object": "block",
-            "type": "bulleted_list_item",
-            "bulleted_list_item": {"rich_text": [{"type": "text", "text": {"content": text}}]}
-        }
+        return _text_block("bulleted_list_item", text)
     
     def _divider(self) -> Dict[str, Any]:
-        return {"object": "block", "type": "divider", "divider": {}}
-    
-    def _toggle(self, title: str, children: List) -> Dict[str, Any]:
-        # Flatten nested lists
-        flat_children = []
-        for child in children:
-            if isinstance(child, list):
-                flat_children.extend(child)
-            else:
-                flat_children.append(child)
-        
+        return _DIVIDER_BLOCK
+    
+    def _toggle_flat(self, title: str, blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """折叠块；blocks 已是展平的 block 列表（调用方保证不超过 100 个）"""
         return {
             "object": "block",
             "type": "toggle",
             "toggle": {
                 "rich_text": [{"type": "text", "text": {"content": title}}],
-                "children": flat_children[:100]  # Notion 限制
+                "children": blocks
             }
         }
     
+    def _toggle_nested(self, title: str, block_lists: Iterable[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """折叠块；block_lists 为每条新闻一组的 block 列表，展平后最多取 100 个（Notion 限制）"""
+        return self._toggle_flat(title, list(islice(chain.from_iterable(block_lists), 100)))
+    
     async def close(self):
         """关闭客户端"""
-        # notion-client 的 AsyncClient 不需要显式关闭
-        pass
+        await self._http_client.aclose()
@@ -1,6 +1,9 @@
 """Telegram Bot 输出 - 推送每日摘要到 Telegram"""
 import asyncio
-from typing import Optional
+import heapq
+import json
+from collections import Counter
+from typing import Optional, List
 from datetime import datetime
 
 try:
@@ -9,12 +12,31 @@ try:
 except ImportError:
     AIOHTTP_AVAILABLE = False
 
-from app.outputs.base import BaseOutput, Digest, DigestItem
+from aiolimiter import AsyncLimiter
+
+from app.outputs.base import BaseOutput, Digest, DigestItem, TickerSummary, truncate_text
 from app.config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# impact_direction -> 方向图标
+_DIRECTION_EMOJI = {"bullish": "📈", "bearish": "📉"}
+
+# confidence 档位排序（"重要新闻"至少为 medium，high 优先）
+_CONFIDENCE_RANK = {"high": 2, "medium": 1, "low": 0}
+_IMPORTANT_MIN_RANK = 1
+
+# 整体情绪 -> (图标, 文案)
+_SENTIMENT_LABELS = {
+    "bullish": ("🟢", "偏多"),
+    "bearish": ("🔴", "偏空"),
+    "neutral": ("⚪", "中性"),
+}
+
+# Telegram 全局限制约 30 条/秒，留一点余量
+_GLOBAL_SEND_RATE = 29
+
 
 class TelegramOutput(BaseOutput):
     """
@@ -30,10 +52,14 @@ class TelegramOutput(BaseOutput):
     2. 发送 /newbot 创建机器人
     3. 获取 Bot Token
     4. 获取你的 Chat ID（可以用 @userinfobot）
+       多个 Chat ID 用逗号分隔，会并发推送
     """
     
     output_name = "telegram"
     
+    # 发送失败（429 / 5xx / 网络错误）时的最大重试次数
+    max_retries = 3
+    
     def __init__(
         self,
         bot_token: Optional[str] = None,
@@ -50,68 +76,121 @@ class TelegramOutput(BaseOutput):
         if not self.chat_id:
             raise ValueError("Telegram chat ID not configured")
         
+        self.chat_ids = [c.strip() for c in str(self.chat_id).split(",") if c.strip()]
         self.api_base = f"https://api.telegram.org/bot{self.bot_token}"
         self._session: Optional[aiohttp.ClientSession] = None
+        self._limiter = AsyncLimiter(_GLOBAL_SEND_RATE, 1)
     
     async def __aenter__(self):
-        self._session = aiohttp.ClientSession()
+        self._ensure_session()
         return self
     
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._session:
+    def _ensure_session(self) -> "aiohttp.ClientSession":
+        """获取共享 session（首次调用时创建，复用到 api.telegram.org 的 TLS 连接）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=4,
+                    keepalive_timeout=30,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=20)
+            )
+        return self._session
+    
+    async def close(self):
+        """关闭 HTTP session"""
+        if self._session and not self._session.closed:
             await self._session.close()
+        self._session = None
     
     async def _send_message(
         self,
         text: str,
         parse_mode: str = "HTML",
-        disable_preview: bool = True
+        disable_preview: bool = True,
+        chat_id: Optional[str] = None
     ) -> bool:
         """发送消息到 Telegram"""
-        if not self._session:
-            self._session = aiohttp.ClientSession()
+        session = self._ensure_session()
         
         url = f"{self.api_base}/sendMessage"
         payload = {
-            "chat_id": self.chat_id,
+            "chat_id": chat_id or self.chat_ids[0],
             "text": text,
             "parse_mode": parse_mode,
             "disable_web_page_preview": disable_preview
         }
         
-        try:
-            async with self._session.post(url, json=payload) as resp:
-                if resp.status == 200:
-                    return True
-                else:
+        for attempt in range(self.max_retries + 1):
+            retry_after: Optional[float] = None
+            try:
+                async with self._limiter, session.post(url, json=payload) as resp:
+                    if resp.status == 200:
+                        return True
+                    
                     error = await resp.text()
-                    logger.error(f"Telegram API error: {resp.status} - {error}")
-                    return False
-        except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+                    if resp.status == 429:
+                        # 限流：读取 Retry-After 头或 parameters.retry_after
+                        retry_after = self._parse_retry_after(resp.headers.get("Retry-After"), error)
+                    elif resp.status < 500:
+                        # 其他客户端错误，不重试
+                        logger.error(f"Telegram API error: {resp.status} - {error}")
+                        return False
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # 网络错误，重试
+                error = str(e) or type(e).__name__
+            except Exception as e:
+                logger.error(f"Failed to send Telegram message: {e}")
+                return False
+            
+            if attempt < self.max_retries:
+                wait_time = min(max(2 ** attempt, retry_after or 0), 60.0)
+                logger.warning(
+                    "Telegram send failed, retrying",
+                    attempt=attempt + 1,
+                    wait_seconds=wait_time,
+                    error=error[:200]
+                )
+                await asyncio.sleep(wait_time)
+        
+        logger.error(f"Failed to send Telegram message after {self.max_retries} retries: {error}")
+        return False
+    
+    @staticmethod
+    def _parse_retry_after(header: Optional[str], body: str) -> Optional[float]:
+        """解析 429 响应的等待时间（Retry-After 头优先，其次 JSON parameters.retry_after）"""
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+        try:
+            return float(json.loads(body)["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return None
     
     async def _send_photo(
         self,
         photo_path: str,
-        caption: str = ""
+        caption: str = "",
+        chat_id: Optional[str] = None
     ) -> bool:
         """发送图片到 Telegram"""
-        if not self._session:
-            self._session = aiohttp.ClientSession()
+        session = self._ensure_session()
         
         url = f"{self.api_base}/sendPhoto"
         
         try:
             with open(photo_path, 'rb') as photo:
                 data = aiohttp.FormData()
-                data.add_field('chat_id', self.chat_id)
+                data.add_field('chat_id', chat_id or self.chat_ids[0])
                 data.add_field('photo', photo, filename=photo_path.split('/')[-1])
                 if caption:
                     data.add_field('caption', caption[:1024])  # Telegram 限制
                     data.add_field('parse_mode', 'HTML')
                 
-                async with self._session.post(url, data=data) as resp:
+                async with self._limiter, session.post(url, data=data) as resp:
                     return resp.status == 200
         except Exception as e:
             logger.error(f"Failed to send Telegram photo: {e}")
@@ -120,20 +199,18 @@ class TelegramOutput(BaseOutput):
     def _format_digest_message(self, digest: Digest) -> str:
         """格式化摘要消息（HTML 格式）"""
         # 统计
-        bullish = sum(1 for item in digest.items if item.analysis and item.analysis.impact_direction == "bullish")
-        bearish = sum(1 for item in digest.items if item.analysis and item.analysis.impact_direction == "bearish")
+        counts = digest.direction_counts
+        bullish, bearish = counts["bullish"], counts["bearish"]
         neutral = len(digest.items) - bullish - bearish
         
         # 确定整体情绪
         if bullish > bearish * 2:
-            sentiment_emoji = "🟢"
-            sentiment_text = "偏多"
+            sentiment = "bullish"
         elif bearish > bullish * 2:
-            sentiment_emoji = "🔴"
-            sentiment_text = "偏空"
+            sentiment = "bearish"
         else:
-            sentiment_emoji = "⚪"
-            sentiment_text = "中性"
+            sentiment = "neutral"
+        sentiment_emoji, sentiment_text = _SENTIMENT_LABELS[sentiment]
         
         # 构建消息
         lines = [
@@ -146,61 +223,79 @@ class TelegramOutput(BaseOutput):
             "<b>📊 各股要点:</b>",
         ]
         
-        # 按 ticker 分组
-        ticker_items: dict = {}
-        for item in digest.items:
-            for ticker in item.news.tickers:
-                if ticker not in ticker_items:
-                    ticker_items[ticker] = []
-                ticker_items[ticker].append(item)
-        
-        # 添加每个 ticker 的摘要
-        for ticker, items in list(ticker_items.items())[:8]:  # 限制数量
-            # 统计该 ticker 的情绪
-            t_bullish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bullish")
-            t_bearish = sum(1 for i in items if i.analysis and i.analysis.impact_direction == "bearish")
-            
-            if t_bullish > t_bearish:
-                emoji = "🟢"
-            elif t_bearish > t_bullish:
-                emoji = "🔴"
-            else:
-                emoji = "⚪"
-            
-            # 获取 AI 摘要
-            summary_text = ""
-            if ticker in digest.ticker_summaries:
-                ts = digest.ticker_summaries[ticker]
-                summary_text = f"\n   └ {ts.summary[:80]}..." if len(ts.summary) > 80 else f"\n   └ {ts.summary}"
-            
-            lines.append(f"{emoji} <b>${ticker}</b>: {len(items)} 条新闻 ({t_bullish}↑ {t_bearish}↓){summary_text}")
+        # 添加每个 ticker 的摘要（按新闻数量取前 8 只）
+        top_tickers = heapq.nlargest(8, digest.by_ticker.items(), key=lambda kv: len(kv[1]))
+        lines.extend([
+            self._format_ticker_line(
+                ticker,
+                items,
+                digest.ticker_summaries.get(ticker),
+                digest.ticker_direction_counts(ticker)
+            )
+            for ticker, items in top_tickers
+        ])
         
-        # 添加重要新闻
-        important_items = [
-            item for item in digest.items 
-            if item.analysis and item.analysis.confidence >= 0.7
-        ][:5]
+        # 添加重要新闻（按 confidence 档位取前 5，同档保持原顺序）
+        important_items = heapq.nlargest(
+            5,
+            (
+                item for item in digest.items
+                if item.analysis
+                and _CONFIDENCE_RANK.get(item.analysis.confidence, 0) >= _IMPORTANT_MIN_RANK
+            ),
+            key=lambda item: _CONFIDENCE_RANK[item.analysis.confidence]
+        )
         
         if important_items:
             lines.append("")
             lines.append("<b>🔥 重要新闻:</b>")
-            for item in important_items:
-                direction = "📈" if item.analysis.impact_direction == "bullish" else "📉" if item.analysis.impact_direction == "bearish" else "➖"
-                title = item.news.title[:50] + "..." if len(item.news.title) > 50 else item.news.title
-                lines.append(f"{direction} {title}")
+            lines.extend([
+                f"{_DIRECTION_EMOJI.get(item.analysis.impact_direction, '➖')} {truncate_text(item.news.title, 50)}"
+                for item in important_items
+            ])
         
         lines.append("")
         lines.append("<i>💡 完整报告已保存到本地</i>")
         
         return "\n".join(lines)
     
+    def _format_ticker_line(
+        self,
+        ticker: str,
+        items: List[DigestItem],
+        summary: Optional[TickerSummary],
+        t_counts: Counter
+    ) -> str:
+        """格式化单只股票的要点行（t_counts 为该 ticker 的情绪计数）"""
+        t_bullish, t_bearish = t_counts["bullish"], t_counts["bearish"]
+        
+        if t_bullish > t_bearish:
+            emoji = "🟢"
+        elif t_bearish > t_bullish:
+            emoji = "🔴"
+        else:
+            emoji = "⚪"
+        
+        # AI 摘要
+        summary_text = f"\n   └ {truncate_text(summary.summary, 80)}" if summary else ""
+        
+        return f"{emoji} <b>${ticker}</b>: {len(items)} 条新闻 ({t_bullish}↑ {t_bearish}↓){summary_text}"
+    
     async def deliver(self, digest: Digest) -> bool:
         """推送摘要到 Telegram"""
         logger.info("Sending digest to Telegram...")
         
         # 发送主消息
         message = self._format_digest_message(digest)
-        success = await self._send_message(message)
+        if len(self.chat_ids) == 1:
+            success = await self._send_message(message)
+        else:
+            # 多个 chat 并发推送，共享全局限流
+            results = await asyncio.gather(*(
+                self._send_message(message, chat_id=chat_id)
+                for chat_id in self.chat_ids
+            ))
+            success = all(results)
         
         if success:
             logger.info("✅ Telegram notification sent successfully")
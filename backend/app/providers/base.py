@@ -1,17 +1,249 @@
 """AI Provider 抽象基类 - 策略模式"""
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from functools import lru_cache
 from pathlib import Path
-import json
+import asyncio
+import logging
+import re
+import string
 
+import orjson
 from pydantic import ValidationError
 
-from app.models.schemas import AIAnalysisOutput, NewsItemCreate
+from app.models.schemas import AIAnalysisOutput, NewsItemCreate, TickerSummaryOutput
 from app.utils.logger import get_logger
 from app.config import settings
 
+# 可选：fastjsonschema 编译出的校验函数，作为 Pydantic 之前的快速路径
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+
 logger = get_logger(__name__)
 
+# structlog 底层的标准库 logger，用于在拼接调试信息前判断 DEBUG 是否开启
+_stdlib_logger = logging.getLogger(__name__)
+
+
+def _debug_enabled() -> bool:
+    return _stdlib_logger.isEnabledFor(logging.DEBUG)
+
+
+# 默认新闻分析 Prompt（prompts 目录下没有对应版本文件时使用）
+_DEFAULT_ANALYSIS_PROMPT = """You are a senior equity research analyst. Analyze the following news and output a JSON object.
+
+News:
+- Ticker(s): {tickers}
+- Title: {title}
+- Source: {source}
+- Published: {published_at}
+- Summary: {content}
+
+Investment Thesis: {thesis}
+
+Output ONLY a valid JSON object with these exact fields:
+{{
+  "event_type": "<earnings|guidance|regulatory|contract|product|accident|macro|rumor|other>",
+  "impact_direction": "<bullish|bearish|neutral>",
+  "impact_horizon": "<short|medium|long>",
+  "thesis_relation": "<supports|weakens|unrelated>",
+  "confidence": "<high|medium|low>",
+  "confidence_reason": "<max 100 chars>",
+  "summary": "<max 100 chars>",
+  "key_facts": ["<fact1>", "<fact2>"],
+  "watch_next": "<max 50 chars>"
+}}
+
+No markdown, no extra text. JSON only."""
+
+# 默认股票汇总 Prompt
+_DEFAULT_SUMMARY_PROMPT = """你是一位专业的股票分析师。基于今日关于 {ticker} ({company_name}) 的新闻，生成简洁的每日汇总。
+
+投资论点: {thesis}
+
+今日新闻:
+{news_list}
+
+输出 JSON 格式:
+{{
+  "overall_sentiment": "bullish|bearish|neutral|mixed",
+  "summary": "1-2句话总结",
+  "key_events": ["事件1", "事件2"],
+  "thesis_impact": "对论点的影响",
+  "action_suggestion": "建议行动",
+  "risk_alerts": ["风险1"]
+}}
+
+只输出 JSON。"""
+
+
+def _strict_json_schema(model) -> dict:
+    """
+    生成 OpenAI Structured Outputs (strict) 可接受的 JSON Schema
+    
+    strict 模式要求所有字段必填、禁止多余字段，且不支持长度 / 默认值约束；
+    长度限制仍由 AIAnalysisOutput 的 before 校验器截断保证
+    """
+    properties = {
+        name: {k: v for k, v in prop.items() if k not in ("default", "maxLength", "maxItems")}
+        for name, prop in model.model_json_schema()["properties"].items()
+    }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+# 新闻分析的结构化输出 Schema（Provider 约束模型按此结构生成，无需失败后再次调用）
+AI_ANALYSIS_JSON_SCHEMA = _strict_json_schema(AIAnalysisOutput)
+
+
+# 格式完全合规的输出（绝大多数）只需过一遍编译后的 schema 校验，再 model_construct 跳过 Pydantic 校验；
+# 不合规时仍交给 Pydantic 截断 / 补默认值或报错
+# 字段校验器会把每条 key_fact 截断到 200 字符、最多 3 条，schema 需同样约束，
+# 否则超长输入走快速路径时不会被截断，两条路径结果不一致
+KEY_FACT_MAX_LENGTH = 200
+KEY_FACTS_MAX_ITEMS = 3
+
+
+def _analysis_fast_schema() -> dict:
+    """AIAnalysisOutput 的 JSON Schema，补上字段校验器隐含的 key_facts 约束"""
+    schema = AIAnalysisOutput.model_json_schema()
+    key_facts = schema["properties"]["key_facts"]
+    key_facts["maxItems"] = KEY_FACTS_MAX_ITEMS
+    key_facts["items"] = {**key_facts.get("items", {}), "maxLength": KEY_FACT_MAX_LENGTH}
+    return schema
+
+
+if FASTJSONSCHEMA_AVAILABLE:
+    _VALIDATE_ANALYSIS_FAST = fastjsonschema.compile(_analysis_fast_schema())
+    _VALIDATE_SUMMARY_FAST = fastjsonschema.compile(TickerSummaryOutput.model_json_schema())
+else:
+    _VALIDATE_ANALYSIS_FAST = _VALIDATE_SUMMARY_FAST = None
+
+
+def _fast_validate(validator, cleaned: str) -> Optional[dict]:
+    """用编译后的 schema 快速校验 JSON 文本，通过时返回解析后的 dict，否则返回 None"""
+    if validator is None:
+        return None
+    try:
+        data = orjson.loads(cleaned)
+        validator(data)
+    except (orjson.JSONDecodeError, fastjsonschema.JsonSchemaException):
+        return None
+    return data
+
+
+# markdown 代码块（```json ... ```）中的内容
+_FENCE_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)```')
+
+
+def _extract_json(raw_output: str) -> str:
+    """
+    从模型输出中截取 JSON 对象文本
+    
+    大多数输出本身就是纯 JSON：没有反引号时直接按首个 { 与末个 } 截取；
+    有代码块时先取出代码块内容。找不到对象时返回去除首尾空白后的原文
+    """
+    cleaned = raw_output.strip()
+    
+    if "`" in cleaned:
+        fence = _FENCE_RE.search(cleaned)
+        if fence:
+            cleaned = fence.group(1)
+        else:
+            # 代码块不完整：移除所有 ``` 标记
+            cleaned = cleaned.replace("```json", "").replace("```", "")
+    
+    start = cleaned.find("{")
+    end = cleaned.rfind("}") + 1
+    if start >= 0 and end > start:
+        return cleaned[start:end]
+    return cleaned.strip()
+
+
+# 汇总 prompt 中新闻发布时间的格式
+_HM_FMT = "%H:%M"
+
+
+# prompts 目录下模板文件的内容缓存 {文件名: 内容}，由 preload_prompts 在注册 Provider 时填充
+_PROMPT_CACHE: Dict[str, str] = {}
+
+
+def preload_prompts(prompts_dir: Optional[str] = None) -> int:
+    """一次性读入 prompts 目录下所有 .txt 模板，返回读入的文件数"""
+    directory = Path(prompts_dir or settings.prompts_dir)
+    for path in directory.glob("*.txt"):
+        _PROMPT_CACHE[path.name] = path.read_text(encoding="utf-8")
+    return len(_PROMPT_CACHE)
+
+
+def _read_prompt_file(filename: str) -> Optional[str]:
+    """读取 prompt 模板：优先查预加载缓存，未命中再读盘并写回缓存；文件不存在返回 None"""
+    text = _PROMPT_CACHE.get(filename)
+    if text is None:
+        path = Path(settings.prompts_dir) / filename
+        if not path.exists():
+            return None
+        text = _PROMPT_CACHE[filename] = path.read_text(encoding="utf-8")
+    return text
+
+
+@lru_cache(maxsize=16)
+def _split_prompt_template(template: str) -> Tuple[str, str]:
+    """
+    把分析模板拆成 (静态指令, 新闻变量段模板)
+    
+    变量段为第一个到最后一个含占位符的行（含紧贴其上的小标题）；其余行（角色说明、JSON 格式、规则）
+    在所有请求间保持不变，作为 system 指令发送，便于命中 Provider 的前缀缓存
+    """
+    lines = template.split("\n")
+    field_lines = [
+        i for i, line in enumerate(lines)
+        if any(field is not None for _, field, _, _ in string.Formatter().parse(line))
+    ]
+    if not field_lines:
+        return "", template
+    
+    first, last = field_lines[0], field_lines[-1]
+    # 紧贴变量段的小标题（如 "News:"）归入变量段
+    while first > 0 and lines[first - 1].strip():
+        first -= 1
+    # 静态部分不含占位符，format() 只做 {{ }} 反转义
+    head = "\n".join(lines[:first]).strip()
+    tail = "\n".join(lines[last + 1:]).strip()
+    static = "\n\n".join(part for part in (head, tail) if part).format()
+    return static, "\n".join(lines[first:last + 1])
+
+
+@lru_cache(maxsize=1024)
+def _format_prompt_cached(
+    template: str,
+    tickers: str,
+    title: str,
+    source: str,
+    published_at: str,
+    content: str,
+    thesis: str
+) -> str:
+    """按字段缓存格式化结果（同一条新闻重复分析时不再重新 format）"""
+    return template.format(
+        tickers=tickers,
+        title=title,
+        news_title=title,  # 兼容新模板
+        source=source,
+        published_at=published_at,
+        content=content,
+        news_content=content,  # 兼容新模板
+        thesis=thesis
+    )
+
 
 class AIProviderError(Exception):
     """AI Provider 错误"""
@@ -32,8 +264,7 @@ class BaseAIProvider(ABC):
     - _call_api(): 调用具体的 AI API
     
     基类提供:
-    - 严格 JSON Schema 校验
-    - 重试逻辑
+    - 严格 JSON Schema 校验（Provider 侧结构化输出 + 本地 Pydantic 校验）
     - Prompt 加载
     - 成本追踪
     """
@@ -42,8 +273,24 @@ class BaseAIProvider(ABC):
     model_name: str = "unknown"
     prompt_version: str = "v1.0"
     
-    def __init__(self):
+    # batch_analyze 同时在途的请求数上限
+    max_concurrency: int = 8
+    
+    # 支持 _call_api_batch 的 Provider 每个请求打包的新闻条数
+    analysis_batch_size: int = 10
+    
+    # 分析响应缓存条数（相同 prompt 不重复调用 API）
+    RESPONSE_CACHE_SIZE: int = 1024
+    
+    # 由工厂缓存复用的默认实例：async with 退出时不关闭，统一在 aclose_shared 中释放
+    _shared: bool = False
+    
+    def __init__(self, max_concurrency: Optional[int] = None):
         self._prompt_template: Optional[str] = None
+        self._summary_prompt_template: Optional[str] = None
+        self._response_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
     
     @property
     def prompt_template(self) -> str:
@@ -52,63 +299,49 @@ class BaseAIProvider(ABC):
             self._prompt_template = self._load_prompt()
         return self._prompt_template
     
+    @property
+    def system_prompt(self) -> str:
+        """分析模板中与具体新闻无关的静态指令"""
+        return _split_prompt_template(self.prompt_template)[0]
+    
     def _load_prompt(self) -> str:
         """从文件加载 Prompt 模板"""
-        prompt_path = Path(settings.prompts_dir) / f"news_analysis_{self.prompt_version}.txt"
-        
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding="utf-8")
+        filename = f"news_analysis_{self.prompt_version}.txt"
+        text = _read_prompt_file(filename)
+        if text is not None:
+            return text
         
         # 默认 Prompt
-        logger.warning(f"Prompt file not found: {prompt_path}, using default")
+        logger.warning(f"Prompt file not found: {Path(settings.prompts_dir) / filename}, using default")
         return self._default_prompt()
     
     def _default_prompt(self) -> str:
         """默认 Prompt 模板"""
-        return """You are a senior equity research analyst. Analyze the following news and output a JSON object.
-
-News:
-- Ticker(s): {tickers}
-- Title: {title}
-- Source: {source}
-- Published: {published_at}
-- Summary: {content}
-
-Investment Thesis: {thesis}
-
-Output ONLY a valid JSON object with these exact fields:
-{{
-  "event_type": "<earnings|guidance|regulatory|contract|product|accident|macro|rumor|other>",
-  "impact_direction": "<bullish|bearish|neutral>",
-  "impact_horizon": "<short|medium|long>",
-  "thesis_relation": "<supports|weakens|unrelated>",
-  "confidence": "<high|medium|low>",
-  "confidence_reason": "<max 100 chars>",
-  "summary": "<max 100 chars>",
-  "key_facts": ["<fact1>", "<fact2>"],
-  "watch_next": "<max 50 chars>"
-}}
-
-No markdown, no extra text. JSON only."""
+        return _DEFAULT_ANALYSIS_PROMPT
     
     def format_prompt(
         self,
         news: NewsItemCreate,
         thesis: str = ""
-    ) -> str:
-        """格式化 Prompt"""
+    ) -> Tuple[str, str]:
+        """
+        格式化 Prompt
+        
+        Returns:
+            (system_text, user_text)：静态指令与只含该条新闻内容的用户消息
+        """
+        system_text, user_template = _split_prompt_template(self.prompt_template)
         tickers_str = ", ".join(news.tickers) if news.tickers else "N/A"
         published_str = news.published_at.strftime("%Y-%m-%d %H:%M UTC") if news.published_at else "Unknown"
         
-        return self.prompt_template.format(
-            tickers=tickers_str,
-            title=news.title,
-            news_title=news.title,  # 兼容新模板
-            source=news.source,
-            published_at=published_str,
-            content=news.summary or "(No summary available)",
-            news_content=news.summary or "(No summary available)",  # 兼容新模板
-            thesis=thesis or "(No specific investment thesis provided)"
+        return system_text, _format_prompt_cached(
+            user_template,
+            tickers_str,
+            news.title,
+            news.source,
+            published_str,
+            news.summary or "(No summary available)",
+            thesis or "(No specific investment thesis provided)"
         )
     
     async def analyze(
@@ -129,37 +362,11 @@ No markdown, no extra text. JSON only."""
         Raises:
             AIAnalysisError: 分析失败
         """
-        prompt = self.format_prompt(news, thesis)
+        system, prompt = self.format_prompt(news, thesis)
         
-        # 第一次尝试
+        # Provider 按 AI_ANALYSIS_JSON_SCHEMA 结构化输出，校验失败时不再重复调用
         try:
-            raw_output, tokens, cost = await self._call_api(prompt)
-            result = self._parse_and_validate(raw_output)
-            return result, tokens, cost
-            
-        except ValidationError as e:
-            logger.warning(
-                "First analysis attempt failed validation, retrying with strict prompt",
-                error=str(e),
-                news_title=news.title[:50]
-            )
-            
-            # 第二次尝试：使用更严格的 Prompt
-            try:
-                strict_prompt = self._make_strict_prompt(prompt, str(e))
-                raw_output, tokens2, cost2 = await self._call_api(strict_prompt)
-                result = self._parse_and_validate(raw_output)
-                return result, tokens + tokens2, cost + cost2
-                
-            except ValidationError as e2:
-                logger.error(
-                    "Second analysis attempt also failed",
-                    error=str(e2),
-                    news_title=news.title[:50]
-                )
-                # 返回一个安全的默认值
-                return self._fallback_result(news), tokens + tokens2, cost + cost2
-            
+            raw_output, tokens, cost = await self._call_api_cached(prompt, system, structured=True)
         except Exception as e:
             logger.error(
                 "AI analysis failed",
@@ -168,6 +375,17 @@ No markdown, no extra text. JSON only."""
                 news_title=news.title[:50]
             )
             raise AIAnalysisError(f"Analysis failed: {e}")
+        
+        try:
+            return self._parse_and_validate(raw_output), tokens, cost
+        except ValidationError as e:
+            logger.error(
+                "Structured analysis output failed validation, using fallback",
+                error=str(e),
+                news_title=news.title[:50]
+            )
+            # 返回一个安全的默认值
+            return self._fallback_result(news), tokens, cost
     
     async def batch_analyze(
         self,
@@ -175,35 +393,66 @@ No markdown, no extra text. JSON only."""
         thesis_map: dict = None
     ) -> List[Tuple[NewsItemCreate, Optional[AIAnalysisOutput], int, float]]:
         """
-        批量分析新闻
+        批量分析新闻（并发执行，最多 max_concurrency 个请求同时在途）
+        
+        Provider 实现了 _call_api_batch 时，每 analysis_batch_size 条新闻打包成一个请求；
+        批量结果中未通过校验的条目单独重新分析
         
         Args:
             news_list: 新闻列表
             thesis_map: {ticker: thesis} 映射
         
         Returns:
-            [(news, analysis_or_none, tokens, cost), ...]
+            [(news, analysis_or_none, tokens, cost), ...]，顺序与 news_list 一致
         """
         thesis_map = thesis_map or {}
-        results = []
-        
-        for news in news_list:
-            # 获取该新闻相关股票的投资论点
-            thesis = ""
-            if news.tickers:
-                for ticker in news.tickers:
-                    if ticker in thesis_map:
-                        thesis = thesis_map[ticker]
-                        break
-            
+        sem = asyncio.Semaphore(self.max_concurrency)
+        
+        def _thesis_for(news: NewsItemCreate) -> str:
+            # 获取该新闻相关股票的投资论点（按新闻中 ticker 的顺序取第一个有论点的）
+            if not news.tickers or not thesis_map:
+                return ""
+            return next((thesis_map[t] for t in news.tickers if t in thesis_map), "")
+        
+        async def _analyze_one(news: NewsItemCreate):
             try:
-                analysis, tokens, cost = await self.analyze(news, thesis)
-                results.append((news, analysis, tokens, cost))
+                analysis, tokens, cost = await self.analyze(news, _thesis_for(news))
+                return news, analysis, tokens, cost
             except AIAnalysisError as e:
                 logger.error(f"Batch analysis failed for news: {news.title[:50]}, error: {e}")
-                results.append((news, None, 0, 0.0))
+                return news, None, 0, 0.0
+        
+        async def _run_one(news: NewsItemCreate):
+            async with sem:
+                return await _analyze_one(news)
+        
+        async def _run_group(group: List[NewsItemCreate]):
+            async with sem:
+                # 同一模板的 system 指令相同，整组只发送一次
+                prompts = [self.format_prompt(news, _thesis_for(news))[1] for news in group]
+                try:
+                    outputs = await self._call_api_batch(prompts, self.system_prompt)
+                except Exception as e:
+                    logger.warning(f"Batched analysis request failed, falling back to single requests: {e}")
+                    return [await _analyze_one(news) for news in group]
+                
+                results = []
+                for news, (raw_output, tokens, cost) in zip(group, outputs):
+                    try:
+                        results.append((news, self._parse_and_validate(raw_output), tokens, cost))
+                    except ValidationError:
+                        # 批量结果中该条不合格，单独用结构化输出重新分析
+                        news, analysis, tokens2, cost2 = await _analyze_one(news)
+                        results.append((news, analysis, tokens + tokens2, cost + cost2))
+                return results
         
-        return results
+        if hasattr(self, "_call_api_batch"):
+            size = self.analysis_batch_size
+            groups = [news_list[i:i + size] for i in range(0, len(news_list), size)]
+            grouped = await asyncio.gather(*(_run_group(group) for group in groups))
+            return [result for group_results in grouped for result in group_results]
+        
+        return list(await asyncio.gather(*(_run_one(news) for news in news_list)))
     
     async def generate_ticker_summary(
         self,
@@ -225,13 +474,13 @@ No markdown, no extra text. JSON only."""
             (summary_dict, tokens_used, cost_usd)
         """
         # 构建新闻列表文本
-        news_list_text = []
-        for i, (news, analysis) in enumerate(news_items, 1):
-            item_text = f"{i}. [{news.published_at.strftime('%H:%M')}] {news.title}"
+        news_list_text = [None] * len(news_items)
+        for i, (news, analysis) in enumerate(news_items):
+            parts = [f"{i + 1}. [{news.published_at:{_HM_FMT}}] {news.title}"]
             if analysis:
-                item_text += f"\n   - Impact: {analysis.impact_direction} ({analysis.event_type})"
-                item_text += f"\n   - Summary: {analysis.summary}"
-            news_list_text.append(item_text)
+                parts.append(f"   - Impact: {analysis.impact_direction} ({analysis.event_type})")
+                parts.append(f"   - Summary: {analysis.summary}")
+            news_list_text[i] = "\n".join(parts)
         
         news_list_str = "\n\n".join(news_list_text)
         
@@ -244,11 +493,13 @@ No markdown, no extra text. JSON only."""
             news_list=news_list_str
         )
         
-        logger.debug(f"Generating summary for {ticker}, prompt length: {len(prompt)}")
+        if _debug_enabled():
+            logger.debug(f"Generating summary for {ticker}, prompt length: {len(prompt)}")
         
         try:
             raw_output, tokens, cost = await self._call_api(prompt)
-            logger.debug(f"Summary API response for {ticker}: {raw_output[:200] if raw_output else 'None'}")
+            if _debug_enabled():
+                logger.debug(f"Summary API response for {ticker}: {raw_output[:200] if raw_output else 'None'}")
             
             if not raw_output:
                 logger.warning(f"Empty API response for {ticker} summary")
@@ -258,70 +509,34 @@ No markdown, no extra text. JSON only."""
             return summary_data, tokens, cost
             
         except Exception as e:
-            import traceback
             logger.warning(f"Ticker summary generation failed for {ticker}: {type(e).__name__}: {e}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            # exc_info 由 structlog 在输出时才格式化
+            logger.debug("Ticker summary traceback", exc_info=True)
             # 返回一个基础的汇总
             return self._fallback_summary(ticker, news_items), 0, 0.0
     
     def _load_summary_prompt(self) -> str:
-        """加载股票汇总 prompt 模板"""
-        prompt_path = Path(settings.prompts_dir) / "ticker_summary_v1.0.txt"
-        if prompt_path.exists():
-            return prompt_path.read_text(encoding="utf-8")
-        
-        # 默认 prompt
-        return """你是一位专业的股票分析师。基于今日关于 {ticker} ({company_name}) 的新闻，生成简洁的每日汇总。
-
-投资论点: {thesis}
-
-今日新闻:
-{news_list}
-
-输出 JSON 格式:
-{{
-  "overall_sentiment": "bullish|bearish|neutral|mixed",
-  "summary": "1-2句话总结",
-  "key_events": ["事件1", "事件2"],
-  "thesis_impact": "对论点的影响",
-  "action_suggestion": "建议行动",
-  "risk_alerts": ["风险1"]
-}}
-
-只输出 JSON。"""
+        """加载股票汇总 prompt 模板（首次加载后缓存在实例上）"""
+        if self._summary_prompt_template is None:
+            # 文件不存在时使用默认 prompt
+            self._summary_prompt_template = _read_prompt_file("ticker_summary_v1.0.txt") or _DEFAULT_SUMMARY_PROMPT
+        return self._summary_prompt_template
     
     def _parse_summary_output(self, raw_output: str) -> dict:
         """解析汇总输出"""
-        cleaned = raw_output.strip()
-        
-        # 移除 markdown 代码块
-        if "```" in cleaned:
-            # 找到 JSON 部分
-            import re
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', cleaned)
-            if json_match:
-                cleaned = json_match.group(1).strip()
-            else:
-                # 移除所有 ``` 标记
-                cleaned = cleaned.replace("```json", "").replace("```", "").strip()
-        
-        # 找到 JSON 对象
-        start = cleaned.find("{")
-        end = cleaned.rfind("}") + 1
-        if start >= 0 and end > start:
-            cleaned = cleaned[start:end]
-        
-        logger.debug(f"Parsing summary JSON: {cleaned[:200]}")
+        cleaned = _extract_json(raw_output)
+        
+        if _debug_enabled():
+            logger.debug(f"Parsing summary JSON: {cleaned[:200]}")
+        
+        data = _fast_validate(_VALIDATE_SUMMARY_FAST, cleaned)
+        if data is not None:
+            return TickerSummaryOutput.model_construct(**data).model_dump()
         
         try:
-            data = json.loads(cleaned)
-            # 确保必要字段存在
-            required = ["overall_sentiment", "summary", "key_events", "thesis_impact", "action_suggestion", "risk_alerts"]
-            for field in required:
-                if field not in data:
-                    data[field] = "" if field in ["summary", "thesis_impact", "action_suggestion"] else []
-            return data
-        except json.JSONDecodeError as e:
+            # 直接从 JSON 字符串校验，缺失字段由 TickerSummaryOutput 补默认值
+            return TickerSummaryOutput.model_validate_json(cleaned).model_dump()
+        except ValidationError as e:
             logger.warning(f"Summary JSON parse error: {e}, content: {cleaned[:200]}")
             return {
                 "overall_sentiment": "neutral",
@@ -338,8 +553,8 @@ No markdown, no extra text. JSON only."""
         news_items: List[Tuple[NewsItemCreate, Optional[AIAnalysisOutput]]]
     ) -> dict:
         """生成基础的汇总（AI 失败时使用）"""
-        bullish = sum(1 for _, a in news_items if a and a.impact_direction == "bullish")
-        bearish = sum(1 for _, a in news_items if a and a.impact_direction == "bearish")
+        counts = Counter(a.impact_direction for _, a in news_items if a)
+        bullish, bearish = counts["bullish"], counts["bearish"]
         
         if bullish > bearish:
             sentiment = "bullish"
@@ -359,67 +574,30 @@ No markdown, no extra text. JSON only."""
     
     def _parse_and_validate(self, raw_output: str) -> AIAnalysisOutput:
         """解析并验证 AI 输出"""
-        # 清理输出（去除可能的 markdown 代码块标记）
-        cleaned = raw_output.strip()
-        
         # 记录原始输出用于调试
-        logger.debug(f"Raw AI output (first 500 chars): {cleaned[:500]}")
-        
-        if cleaned.startswith("```"):
-            # 去除 markdown 代码块
-            lines = cleaned.split("\n")
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            cleaned = "\n".join(lines)
-        
-        # 尝试找到 JSON 对象
-        start = cleaned.find("{")
-        end = cleaned.rfind("}") + 1
-        if start >= 0 and end > start:
-            cleaned = cleaned[start:end]
-        else:
-            logger.warning(f"No JSON object found in output: {cleaned[:200]}")
+        if _debug_enabled():
+            logger.debug(f"Raw AI output (first 500 chars): {raw_output.strip()[:500]}")
         
-        # 解析 JSON
-        try:
-            data = json.loads(cleaned)
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON parse error: {e}, content: {cleaned[:300]}")
-            raise ValidationError.from_exception_data(
-                "AIAnalysisOutput",
-                [{"type": "json_invalid", "msg": f"Invalid JSON: {e}"}]
-            )
+        # 清理输出（去除可能的 markdown 代码块标记，截取 JSON 对象）
+        cleaned = _extract_json(raw_output)
+        if not cleaned.startswith("{"):
+            logger.warning(f"No JSON object found in output: {cleaned[:200]}")
         
-        # 检查是否是错误响应
-        if "error" in data and isinstance(data.get("error"), dict):
-            error_msg = data.get("error", {}).get("message", str(data))
-            logger.warning(f"API returned error response: {error_msg}")
-            raise ValidationError.from_exception_data(
-                "AIAnalysisOutput", 
-                [{"type": "api_error", "msg": f"API error: {error_msg}"}]
-            )
+        # 快速路径：已通过 schema 校验（类型、枚举、长度、key_facts 条数与单条长度均合规），字段校验器不会再做任何修改
+        data = _fast_validate(_VALIDATE_ANALYSIS_FAST, cleaned)
+        if data is not None:
+            return AIAnalysisOutput.model_construct(**data)
         
-        # Pydantic 验证
-        return AIAnalysisOutput.model_validate(data)
-    
-    def _make_strict_prompt(self, original_prompt: str, error_msg: str) -> str:
-        """生成更严格的 Prompt（用于重试）"""
-        return f"""{original_prompt}
-
-IMPORTANT: Your previous response had validation errors: {error_msg}
-
-Please ensure:
-1. Output is ONLY valid JSON, no markdown or extra text
-2. event_type must be exactly one of: earnings, guidance, regulatory, contract, product, accident, macro, rumor, other
-3. impact_direction must be exactly one of: bullish, bearish, neutral
-4. impact_horizon must be exactly one of: short, medium, long
-5. thesis_relation must be exactly one of: supports, weakens, unrelated
-6. confidence must be exactly one of: high, medium, low
-7. summary must be 100 characters or less
-8. key_facts must be an array with at most 3 items
-9. watch_next must be 50 characters or less"""
+        # 直接从 JSON 字符串解析 + 校验（JSON 语法错误同样抛 ValidationError）
+        try:
+            return AIAnalysisOutput.model_validate_json(cleaned, strict=True)
+        except ValidationError as e:
+            # 错误响应（{"error": {...}}）只在校验失败时才需要识别
+            if cleaned[1:].lstrip().startswith('"error"'):
+                logger.warning(f"API returned error response: {cleaned[:300]}")
+            elif e.errors()[0]["type"] == "json_invalid":
+                logger.warning(f"JSON parse error: {e}, content: {cleaned[:300]}")
+            raise
     
     def _fallback_result(self, news: NewsItemCreate) -> AIAnalysisOutput:
         """返回安全的默认分析结果"""
@@ -435,13 +613,45 @@ Please ensure:
             watch_next=""
         )
     
+    async def _call_api_cached(
+        self,
+        prompt: str,
+        system: str = "",
+        structured: bool = False
+    ) -> Tuple[str, int, float]:
+        """
+        带 LRU 缓存的 _call_api：重复的 prompt（重复标题、重跑）直接返回缓存的原始输出
+        
+        命中缓存时 tokens / cost 记为 0
+        """
+        cache = self._response_cache
+        key = (system, prompt)
+        raw_output = cache.get(key)
+        if raw_output is not None:
+            cache.move_to_end(key)
+            return raw_output, 0, 0.0
+        
+        raw_output, tokens, cost = await self._call_api(prompt, system, structured)
+        if raw_output:
+            cache[key] = raw_output
+            if len(cache) > self.RESPONSE_CACHE_SIZE:
+                cache.popitem(last=False)
+        return raw_output, tokens, cost
+    
     @abstractmethod
-    async def _call_api(self, prompt: str) -> Tuple[str, int, float]:
+    async def _call_api(
+        self,
+        prompt: str,
+        system: str = "",
+        structured: bool = False
+    ) -> Tuple[str, int, float]:
         """
         调用具体的 AI API
         
         Args:
-            prompt: 完整的 prompt
+            prompt: 用户消息（分析时只含新闻内容；汇总时为完整 prompt）
+            system: 静态指令（各请求相同，Provider 应放在请求最前以命中前缀缓存）
+            structured: 为 True 时要求模型按 AI_ANALYSIS_JSON_SCHEMA 输出
         
         Returns:
             (raw_output, tokens_used, cost_usd)
@@ -456,4 +666,5 @@ Please ensure:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
+        if not self._shared:
+            await self.close()
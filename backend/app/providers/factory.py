@@ -1,12 +1,22 @@
 """AI Provider 工厂 - 根据配置创建对应的 Provider"""
 from typing import Dict, Type, Optional
+import threading
 
-from app.providers.base import BaseAIProvider, AIProviderError
+import httpx
+
+from app.providers.base import BaseAIProvider, AIProviderError, preload_prompts
 from app.utils.logger import get_logger
 from app.config import settings
 
 logger = get_logger(__name__)
 
+# HTTP/2 需要 h2 包，未安装时回退到 HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 class AIProviderFactory:
     """
@@ -17,6 +27,36 @@ class AIProviderFactory:
     
     _providers: Dict[str, Type[BaseAIProvider]] = {}
     
+    # 配置中默认 Provider 的类（注册时解析）及其懒创建的共享实例
+    _default_provider_class: Optional[Type[BaseAIProvider]] = None
+    _default_instance: Optional[BaseAIProvider] = None
+    _default_lock = threading.Lock()
+    
+    # 所有 Provider 实例共享的 HTTP 连接池（懒创建，进程退出时由 aclose_shared 关闭）
+    _shared_http: Optional[httpx.AsyncClient] = None
+    
+    @classmethod
+    def shared_http_client(cls) -> httpx.AsyncClient:
+        """获取共享 HTTP 客户端，新建的 Provider 复用已建立的 TCP/TLS 连接"""
+        if cls._shared_http is None or cls._shared_http.is_closed:
+            cls._shared_http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(600.0, connect=5.0),
+                follow_redirects=True
+            )
+        return cls._shared_http
+    
+    @classmethod
+    async def aclose_shared(cls):
+        """关闭默认 Provider 实例与共享 HTTP 客户端（应用退出时调用）"""
+        instance, cls._default_instance = cls._default_instance, None
+        if instance is not None:
+            await instance.close()
+        if cls._shared_http is not None:
+            await cls._shared_http.aclose()
+            cls._shared_http = None
+    
     @classmethod
     def register(cls, name: str, provider_class: Type[BaseAIProvider]):
         """注册 Provider"""
@@ -42,6 +82,14 @@ class AIProviderFactory:
         Raises:
             AIProviderError: 未知的 Provider
         """
+        # 常见情况（默认 Provider、无自定义参数）直接复用同一个实例
+        if provider_name is None and not kwargs:
+            instance = cls._default_instance
+            if instance is not None:
+                return instance
+            if cls._default_provider_class is not None:
+                return cls._create_default()
+        
         name = provider_name or settings.ai_provider
         
         if name not in cls._providers:
@@ -59,6 +107,20 @@ class AIProviderFactory:
         except Exception as e:
             raise AIProviderError(f"Failed to create provider {name}: {e}")
     
+    @classmethod
+    def _create_default(cls) -> BaseAIProvider:
+        """创建并缓存默认 Provider 实例（加锁避免并发时重复创建）"""
+        with cls._default_lock:
+            if cls._default_instance is None:
+                try:
+                    instance = cls._default_provider_class()
+                except Exception as e:
+                    raise AIProviderError(f"Failed to create provider {settings.ai_provider}: {e}")
+                instance._shared = True
+                cls._default_instance = instance
+                logger.info(f"Created AI provider: {settings.ai_provider}")
+            return cls._default_instance
+    
     @classmethod
     def list_providers(cls) -> list:
         """列出所有已注册的 Provider"""
@@ -79,6 +141,15 @@ def _register_default_providers():
         AIProviderFactory.register("openai", OpenAIProvider)
     except Exception as e:
         logger.debug(f"OpenAI provider not available: {e}")
+    
+    AIProviderFactory._default_provider_class = AIProviderFactory._providers.get(settings.ai_provider)
+    
+    # 预加载 prompt 模板，避免每个 Provider 实例首次分析时读盘
+    try:
+        count = preload_prompts()
+        logger.debug(f"Preloaded {count} prompt templates")
+    except OSError as e:
+        logger.debug(f"Prompt preload skipped: {e}")
 
 
 # 自动注册
@@ -1,7 +1,10 @@
 """Gemini AI Provider - Google GenAI SDK (新版)"""
 from typing import Tuple, Optional
 
+from app.models.schemas import AIAnalysisOutput
 from app.providers.base import BaseAIProvider, AIProviderError
+from app.utils.rate_limiter import rate_limiter
+from app.utils.token_bucket import TokenBucket, estimate_tokens
 from app.utils.logger import get_logger
 from app.config import settings
 
@@ -10,7 +13,7 @@ logger = get_logger(__name__)
 # 延迟导入 Google GenAI SDK
 try:
     from google import genai
-    from google.genai import types
+    from google.genai import errors, types
     GENAI_AVAILABLE = True
 except ImportError:
     GENAI_AVAILABLE = False
@@ -68,28 +71,57 @@ class GeminiProvider(BaseAIProvider):
             max_output_tokens=8192,  # 避免截断
         )
         
+        # 按模型配额主动节流
+        self._bucket = TokenBucket(rpm=settings.gemini_rate_limit, tpm=settings.gemini_tpm)
+        
+        # system_instruction -> 生成配置（模板固定，实际只有一两份）
+        self._configs = {("", False): self._generation_config}
+        
         logger.info(f"GeminiProvider initialized with model: {self.model_name}")
     
-    async def _call_api(self, prompt: str) -> Tuple[str, int, float]:
+    def _config_for(self, system: str, structured: bool = False) -> "types.GenerateContentConfig":
+        """
+        带 system_instruction 的生成配置（静态指令放在请求前缀，命中 Gemini 隐式缓存）
+        
+        structured 为 True 时按 AIAnalysisOutput 结构化输出
+        """
+        key = (system, structured)
+        config = self._configs.get(key)
+        if config is None:
+            update = {"system_instruction": system or None}
+            if structured:
+                update.update(response_mime_type="application/json", response_schema=AIAnalysisOutput)
+            config = self._configs[key] = self._generation_config.model_copy(update=update)
+        return config
+    
+    async def _call_api(
+        self,
+        prompt: str,
+        system: str = "",
+        structured: bool = False
+    ) -> Tuple[str, int, float]:
         """
         调用 Gemini API
         
         Returns:
             (raw_output, tokens_used, cost_usd)
         """
-        import asyncio
-        
-        def _do_call_sync():
-            # 使用同步方法
-            return self._client.models.generate_content(
+        async def _do_call():
+            # SDK 原生异步接口，不占用线程池
+            return await self._client.aio.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
-                config=self._generation_config,
+                config=self._config_for(system, structured),
             )
         
-        # 在线程池中执行同步调用
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, _do_call_sync)
+        # 令牌桶 + 限流器（预估输出按 1024 tokens 计）
+        reserved = await self._bucket.reserve(estimate_tokens(system) + estimate_tokens(prompt) + 1024)
+        try:
+            response = await rate_limiter.execute("gemini", _do_call)
+        except errors.APIError as e:
+            if e.code == 429:
+                self._bucket.penalize()
+            raise
         
         # 提取文本
         if not response.text:
@@ -105,11 +137,12 @@ class GeminiProvider(BaseAIProvider):
             tokens_input = getattr(response.usage_metadata, 'prompt_token_count', 0) or 0
             tokens_output = getattr(response.usage_metadata, 'candidates_token_count', 0) or 0
         else:
-            # 估算 token（粗略：4 字符 ≈ 1 token）
-            tokens_input = len(prompt) // 4
-            tokens_output = len(raw_output) // 4
+            # 估算 token
+            tokens_input = estimate_tokens(system) + estimate_tokens(prompt)
+            tokens_output = estimate_tokens(raw_output)
         
         total_tokens = tokens_input + tokens_output
+        self._bucket.reconcile(reserved, total_tokens)
         cost_usd = (tokens_input * self.PRICE_INPUT + tokens_output * self.PRICE_OUTPUT) / 1000
         
         logger.debug(
@@ -120,3 +153,9 @@ class GeminiProvider(BaseAIProvider):
         )
         
         return raw_output, total_tokens, cost_usd
+    
+    async def close(self):
+        """关闭异步客户端"""
+        aclose = getattr(self._client.aio, "aclose", None)
+        if aclose:
+            await aclose()
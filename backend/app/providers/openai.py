@@ -1,16 +1,34 @@
 """OpenAI Provider - GPT-4, GPT-4o-mini"""
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+import orjson
 
-from app.providers.base import BaseAIProvider, AIProviderError
+from app.providers.base import AI_ANALYSIS_JSON_SCHEMA, BaseAIProvider, AIProviderError
 from app.utils.rate_limiter import rate_limiter
+from app.utils.token_bucket import TokenBucket, estimate_tokens
 from app.utils.logger import get_logger
 from app.config import settings
 
 logger = get_logger(__name__)
 
+_SYSTEM_PROMPT = "You are a senior equity research analyst. Always respond with valid JSON only, no markdown or extra text."
+
+# 新闻分析的结构化输出格式
+_ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "AIAnalysisOutput", "schema": AI_ANALYSIS_JSON_SCHEMA, "strict": True}
+}
+
+# 多条新闻打包成一个请求时附加的输出格式说明
+_BATCH_INSTRUCTIONS = (
+    "The user message is a JSON object whose \"items\" array holds several independent analysis tasks, "
+    "each with an \"index\" and a \"prompt\". Complete every task on its own. "
+    "Respond with a JSON object {\"results\": [...]} containing, for every task, the JSON object "
+    "requested by its prompt plus an \"index\" field equal to the task's index."
+)
+
 # 延迟导入 OpenAI SDK
 try:
-    from openai import AsyncOpenAI
+    from openai import AsyncOpenAI, RateLimitError
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -54,11 +72,24 @@ class OpenAIProvider(BaseAIProvider):
         if not self.api_key:
             raise AIProviderError("OpenAI API key not configured")
         
-        self._client = AsyncOpenAI(api_key=self.api_key)
+        # 延迟导入，避免与 factory 的 Provider 注册循环导入
+        from app.providers.factory import AIProviderFactory
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=AIProviderFactory.shared_http_client()
+        )
+        
+        # 按账户 RPM / TPM 主动节流
+        self._bucket = TokenBucket(rpm=settings.openai_rate_limit, tpm=settings.openai_tpm)
         
         logger.info(f"OpenAIProvider initialized with model: {self.model_name}")
     
-    async def _call_api(self, prompt: str) -> Tuple[str, int, float]:
+    async def _call_api(
+        self,
+        prompt: str,
+        system: str = "",
+        structured: bool = False
+    ) -> Tuple[str, int, float]:
         """
         调用 OpenAI API
         
@@ -71,7 +102,8 @@ class OpenAIProvider(BaseAIProvider):
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a senior equity research analyst. Always respond with valid JSON only, no markdown or extra text."
+                        # 静态指令放在最前，OpenAI 自动按前缀缓存
+                        "content": f"{_SYSTEM_PROMPT}\n\n{system}" if system else _SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -80,12 +112,16 @@ class OpenAIProvider(BaseAIProvider):
                 ],
                 temperature=0.1,
                 max_tokens=1024,
-                response_format={"type": "json_object"}  # 强制 JSON 输出
+                # 分析请求按 Schema 结构化输出；其余请求强制 JSON 输出
+                response_format=_ANALYSIS_RESPONSE_FORMAT if structured else {"type": "json_object"}
             )
             return response
         
-        # 使用限流器
-        response = await rate_limiter.execute("openai", _do_call)
+        # 令牌桶 + 限流器（预估输出按 max_tokens 计）
+        response = await self._throttled_call(
+            _do_call,
+            estimate_tokens(_SYSTEM_PROMPT) + estimate_tokens(system) + estimate_tokens(prompt) + 1024
+        )
         
         # 提取文本
         if not response.choices:
@@ -98,12 +134,7 @@ class OpenAIProvider(BaseAIProvider):
         tokens_output = response.usage.completion_tokens if response.usage else 0
         total_tokens = tokens_input + tokens_output
         
-        # 获取定价
-        pricing = self.PRICING.get(self.model_name, self.PRICING["gpt-4o-mini"])
-        cost_usd = (
-            tokens_input * pricing["input"] / 1_000_000 +
-            tokens_output * pricing["output"] / 1_000_000
-        )
+        cost_usd = self._calculate_cost(tokens_input, tokens_output)
         
         logger.debug(
             "OpenAI API call completed",
@@ -115,7 +146,87 @@ class OpenAIProvider(BaseAIProvider):
         
         return raw_output, total_tokens, cost_usd
     
+    async def _call_api_batch(self, prompts: List[str], system: str = "") -> List[Tuple[str, int, float]]:
+        """
+        多个 prompt 打包成一次请求（节省 RPM 配额）
+        
+        Returns:
+            与 prompts 一一对应的 [(raw_output, tokens_used, cost_usd), ...]；
+            模型漏掉的条目返回空字符串，由调用方单独重试
+        """
+        user_content = orjson.dumps(
+            {"items": [{"index": i, "prompt": p} for i, p in enumerate(prompts)]}
+        ).decode()
+        
+        async def _do_call():
+            return await self._client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": f"{_SYSTEM_PROMPT}\n\n{system}\n\n{_BATCH_INSTRUCTIONS}"},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.1,
+                max_tokens=1024 * len(prompts),
+                response_format={"type": "json_object"}
+            )
+        
+        response = await self._throttled_call(
+            _do_call,
+            estimate_tokens(system) + estimate_tokens(user_content) + 1024 * len(prompts)
+        )
+        
+        if not response.choices:
+            raise AIProviderError("OpenAI returned no choices")
+        
+        results = orjson.loads(response.choices[0].message.content or "{}").get("results", [])
+        outputs = [""] * len(prompts)
+        for result in results:
+            index = result.pop("index", None) if isinstance(result, dict) else None
+            if isinstance(index, int) and 0 <= index < len(prompts):
+                outputs[index] = orjson.dumps(result).decode()
+        
+        # usage 按输出长度分摊到各条目
+        tokens_input = response.usage.prompt_tokens if response.usage else 0
+        tokens_output = response.usage.completion_tokens if response.usage else 0
+        total_len = sum(len(o) for o in outputs) or 1
+        
+        split = []
+        for output in outputs:
+            share = len(output) / total_len
+            t_in, t_out = round(tokens_input * share), round(tokens_output * share)
+            split.append((output, t_in + t_out, self._calculate_cost(t_in, t_out)))
+        
+        logger.debug(
+            "OpenAI batched API call completed",
+            model=self.model_name,
+            prompts=len(prompts),
+            tokens_input=tokens_input,
+            tokens_output=tokens_output
+        )
+        
+        return split
+    
+    async def _throttled_call(self, do_call, estimated_tokens: int):
+        """令牌桶预占后经限流器调用；按实际 usage 修正预占，429 时临时收紧额度"""
+        reserved = await self._bucket.reserve(estimated_tokens)
+        try:
+            response = await rate_limiter.execute("openai", do_call)
+        except RateLimitError:
+            self._bucket.penalize()
+            raise
+        
+        actual = response.usage.total_tokens if response.usage else reserved
+        self._bucket.reconcile(reserved, actual)
+        return response
+    
+    def _calculate_cost(self, tokens_input: int, tokens_output: int) -> float:
+        """按模型定价计算成本（USD）"""
+        pricing = self.PRICING.get(self.model_name, self.PRICING["gpt-4o-mini"])
+        return (
+            tokens_input * pricing["input"] / 1_000_000 +
+            tokens_output * pricing["output"] / 1_000_000
+        )
+    
     async def close(self):
-        """关闭客户端"""
-        if self._client:
-            await self._client.close()
+        """底层连接池由 AIProviderFactory 共享，不在单个 Provider 关闭时释放"""
+        pass
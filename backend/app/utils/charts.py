@@ -1,9 +1,15 @@
 """股票图表生成器 - K线图与价格走势"""
+import asyncio
+import json
 import os
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
+from app.utils.files import atomic_write_text
 from app.utils.logger import get_logger
 from app.config import settings
 
@@ -13,19 +19,30 @@ logger = get_logger(__name__)
 yf = None
 mpf = None
 plt = None
+pd = None
+
+# 历史行情缓存：进程内 LRU + 磁盘（跨进程 / 跨运行复用），超过 TTL 后重新下载
+HISTORY_CACHE_TTL = 3600
+HISTORY_MEMO_SIZE = 256
+_history_memo: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+
+# 迷你图只作缩略展示，较低分辨率即可
+MINI_CHART_DPI = 80
 
 
 def _ensure_imports():
     """延迟导入图表依赖"""
-    global yf, mpf, plt
+    global yf, mpf, plt, pd
     if yf is None:
         try:
             import yfinance as _yf
             import mplfinance as _mpf
             import matplotlib.pyplot as _plt
+            import pandas as _pd
             yf = _yf
             mpf = _mpf
             plt = _plt
+            pd = _pd
             # 设置中文字体和风格
             plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
             plt.rcParams['axes.unicode_minus'] = False
@@ -36,6 +53,75 @@ def _ensure_imports():
     return True
 
 
+def _load_history(ticker: str, start_iso: str, end_iso: str):
+    """
+    从进程内缓存或磁盘缓存读取 [start, end) 区间的日线数据，未命中或已过期返回 None
+    
+    调用前需已通过 _ensure_imports
+    """
+    key = (ticker, start_iso, end_iso)
+    now = time.time()
+    
+    hit = _history_memo.get(key)
+    if hit is not None and now - hit[0] < HISTORY_CACHE_TTL:
+        _history_memo.move_to_end(key)
+        return hit[1]
+    
+    cache_path = _history_cache_path(*key)
+    try:
+        mtime = cache_path.stat().st_mtime
+        if now - mtime >= HISTORY_CACHE_TTL:
+            return None
+        df = pd.read_pickle(cache_path)
+    except Exception:
+        return None
+    
+    _remember_history(key, df, mtime)
+    return df
+
+
+def _store_history(ticker: str, start_iso: str, end_iso: str, df):
+    """把新下载的数据写入磁盘缓存与进程内缓存"""
+    key = (ticker, start_iso, end_iso)
+    cache_path = _history_cache_path(*key)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_pickle(cache_path)
+    except OSError as e:
+        logger.debug(f"Failed to write history cache for {ticker}: {e}")
+    _remember_history(key, df, time.time())
+
+
+def _remember_history(key: Tuple[str, str, str], df, fetched_at: float):
+    _history_memo[key] = (fetched_at, df)
+    if len(_history_memo) > HISTORY_MEMO_SIZE:
+        _history_memo.popitem(last=False)
+
+
+def _history_cache_path(ticker: str, start_iso: str, end_iso: str) -> Path:
+    return Path(settings.cache_dir) / "charts" / f"{ticker.replace('/', '_')}_{start_iso}_{end_iso}.pkl"
+
+
+def _cached_history(ticker: str, start_iso: str, end_iso: str):
+    """
+    获取 [start, end) 区间的日线数据，依次查进程内缓存、磁盘缓存，都未命中时才请求 Yahoo
+    
+    调用前需已通过 _ensure_imports；空结果不缓存
+    """
+    df = _load_history(ticker, start_iso, end_iso)
+    if df is None:
+        df = yf.Ticker(ticker).history(start=start_iso, end=end_iso)
+        if not df.empty:
+            _store_history(ticker, start_iso, end_iso, df)
+    return df
+
+
+def _history_range(days: int) -> Tuple[str, str]:
+    """最近 days 天的 (start, end) 日期；yfinance 的 end 不含当天，因此取明天"""
+    today = date.today()
+    return (today - timedelta(days=days)).isoformat(), (today + timedelta(days=1)).isoformat()
+
+
 class ChartGenerator:
     """
     股票图表生成器
@@ -43,9 +129,13 @@ class ChartGenerator:
     生成 K 线图和价格走势图，保存为 PNG 文件
     """
     
+    # 公司名缓存文件（位于 settings.cache_dir/charts，{ticker: name}）
+    NAME_CACHE_FILE = "names.json"
+    
     def __init__(self, output_dir: Optional[str] = None):
         self.output_dir = Path(output_dir or "data/charts")
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._name_cache: Optional[Dict[str, str]] = None
         
     def generate_price_chart(
         self,
@@ -70,11 +160,7 @@ class ChartGenerator:
             
         try:
             # 获取股票数据
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            stock = yf.Ticker(ticker)
-            df = stock.history(start=start_date, end=end_date)
+            df = _cached_history(ticker, *_history_range(days))
             
             if df.empty:
                 logger.warning(f"No data available for {ticker}")
@@ -106,8 +192,7 @@ class ChartGenerator:
             mav = (5, 20) if days >= 20 else (5,) if days >= 5 else None
             
             # 获取公司信息
-            info = stock.info
-            company_name = info.get('shortName', ticker)
+            company_name = self._company_name(ticker)
             current_price = df['Close'].iloc[-1] if len(df) > 0 else 0
             price_change = ((df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1) * 100 if len(df) > 1 else 0
             
@@ -125,6 +210,11 @@ class ChartGenerator:
                 panel_ratios=(3, 1),
             )
             
+            # K 线 / 成交量等数据图元按位图渲染，坐标轴与文字保持矢量
+            for ax in axes:
+                for artist in ax.collections:
+                    artist.set_rasterized(True)
+            
             # 保存图表
             fig.savefig(filepath, dpi=150, bbox_inches='tight', facecolor='#1a1a2e')
             plt.close(fig)
@@ -136,6 +226,57 @@ class ChartGenerator:
             logger.error(f"Failed to generate chart for {ticker}: {e}")
             return None
     
+    def _name_cache_path(self) -> Path:
+        return Path(settings.cache_dir) / "charts" / self.NAME_CACHE_FILE
+    
+    def _company_name(self, ticker: str) -> str:
+        """
+        获取公司名（用于图表标题）
+        
+        优先读本地缓存；未命中时先查 fast_info，再退回完整的 info 请求；都失败时使用 ticker
+        """
+        if self._name_cache is None:
+            try:
+                self._name_cache = json.loads(self._name_cache_path().read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._name_cache = {}
+        
+        name = self._name_cache.get(ticker)
+        if name:
+            return name
+        
+        try:
+            stock = yf.Ticker(ticker)
+            name = stock.info.get('shortName')
+        except Exception as e:
+            logger.debug(f"Failed to fetch company name for {ticker}: {e}")
+            name = None
+        if not name:
+            return ticker
+        
+        self._name_cache[ticker] = name
+        self._save_company_name(ticker, name)
+        return name
+    
+    def _save_company_name(self, ticker: str, name: str):
+        """
+        写回本地缓存（与文件中已有内容合并，失败不影响出图）
+        
+        多个工作进程可能同时写入：先写临时文件再 os.replace 原子替换，
+        读者只会看到完整的旧文件或新文件，不会因读到半截 JSON 而丢掉其他条目
+        """
+        path = self._name_cache_path()
+        try:
+            try:
+                cache = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                cache = {}
+            cache[ticker] = name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(path, json.dumps(cache, ensure_ascii=False))
+        except OSError as e:
+            logger.debug(f"Failed to cache company name: {e}")
+    
     def generate_mini_chart(
         self,
         ticker: str,
@@ -153,13 +294,36 @@ class ChartGenerator:
         """
         if not _ensure_imports():
             return None
-            
+        
+        with _MiniChartRenderer() as renderer:
+            return self._render_mini_chart(renderer, ticker, days)
+    
+    def generate_mini_charts(
+        self,
+        tickers: List[str],
+        days: int = 5
+    ) -> Dict[str, Optional[str]]:
+        """
+        批量生成迷你图，所有股票复用同一个 Figure
+        
+        Returns:
+            {ticker: filepath} 映射
+        """
+        if not _ensure_imports():
+            return dict.fromkeys(tickers)
+        
+        with _MiniChartRenderer() as renderer:
+            return {ticker: self._render_mini_chart(renderer, ticker, days) for ticker in tickers}
+    
+    def _render_mini_chart(
+        self,
+        renderer: "_MiniChartRenderer",
+        ticker: str,
+        days: int
+    ) -> Optional[str]:
+        """获取数据并用给定渲染器绘制一张迷你图"""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            stock = yf.Ticker(ticker)
-            df = stock.history(start=start_date, end=end_date)
+            df = _cached_history(ticker, *_history_range(days))
             
             if df.empty or len(df) < 2:
                 return None
@@ -167,50 +331,7 @@ class ChartGenerator:
             # 生成迷你图
             filename = f"{ticker}_mini_{datetime.now().strftime('%Y%m%d')}.png"
             filepath = self.output_dir / filename
-            
-            fig, ax = plt.subplots(figsize=(4, 1.5), facecolor='#1a1a2e')
-            ax.set_facecolor('#1a1a2e')
-            
-            # 判断涨跌
-            is_up = df['Close'].iloc[-1] >= df['Close'].iloc[0]
-            color = '#00ff88' if is_up else '#ff4444'
-            
-            # 绘制价格线
-            ax.plot(df.index, df['Close'], color=color, linewidth=2)
-            ax.fill_between(df.index, df['Close'], alpha=0.3, color=color)
-            
-            # 隐藏坐标轴
-            ax.set_xticks([])
-            ax.set_yticks([])
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['bottom'].set_visible(False)
-            ax.spines['left'].set_visible(False)
-            
-            # 添加价格标注
-            current = df['Close'].iloc[-1]
-            change = ((current / df['Close'].iloc[0]) - 1) * 100
-            ax.text(
-                0.02, 0.95, f'${current:.2f}',
-                transform=ax.transAxes,
-                color='white',
-                fontsize=10,
-                fontweight='bold',
-                va='top'
-            )
-            ax.text(
-                0.98, 0.95, f'{change:+.1f}%',
-                transform=ax.transAxes,
-                color=color,
-                fontsize=9,
-                fontweight='bold',
-                va='top',
-                ha='right'
-            )
-            
-            fig.tight_layout(pad=0.1)
-            fig.savefig(filepath, dpi=100, bbox_inches='tight', facecolor='#1a1a2e')
-            plt.close(fig)
+            renderer.render(df, filepath)
             
             return str(filepath)
             
@@ -218,25 +339,185 @@ class ChartGenerator:
             logger.error(f"Failed to generate mini chart for {ticker}: {e}")
             return None
     
+    def _batch_fetch(self, tickers: List[str], days: int) -> Dict[str, Any]:
+        """
+        用一次 yf.download 批量下载缓存中没有的股票数据，并写入历史数据缓存
+        
+        Returns:
+            {ticker: DataFrame}（只含本次下载到数据的股票）
+        """
+        if not _ensure_imports():
+            return {}
+        
+        start_iso, end_iso = _history_range(days)
+        missing = [ticker for ticker in tickers if _load_history(ticker, start_iso, end_iso) is None]
+        if not missing:
+            return {}
+        
+        try:
+            data = yf.download(
+                tickers=" ".join(missing),
+                start=start_iso,
+                end=end_iso,
+                group_by="ticker",
+                threads=True,
+                progress=False,
+            )
+        except Exception as e:
+            logger.warning(f"Batch price download failed, falling back to per-ticker fetch: {e}")
+            return {}
+        
+        fetched: Dict[str, Any] = {}
+        for ticker in missing:
+            try:
+                df = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+            except KeyError:
+                continue
+            df = df.dropna(how="all")
+            if not df.empty:
+                _store_history(ticker, start_iso, end_iso, df)
+                fetched[ticker] = df
+        return fetched
+    
+    async def agenerate_batch_charts(
+        self,
+        tickers: List[str],
+        days: int = 30,
+        mini: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """
+        并行批量生成图表
+        
+        先用一次 yf.download 批量预取行情，再在独立进程中渲染（matplotlib 非线程安全），
+        各进程首次绘图时自行完成延迟导入。mini=True 时每个进程分到一组股票，
+        组内复用同一个 Figure
+        
+        Args:
+            tickers: 股票代码列表
+            days: 历史天数
+            mini: 是否生成迷你图
+            
+        Returns:
+            {ticker: filepath} 映射
+        """
+        if not tickers:
+            return {}
+        
+        loop = asyncio.get_running_loop()
+        max_workers = min(len(tickers), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            # 先一次性下载所有股票的行情写入磁盘缓存，各进程渲染时直接读取
+            if len(tickers) > 1:
+                try:
+                    await loop.run_in_executor(pool, self._batch_fetch, tickers, days)
+                except Exception as e:
+                    logger.warning(f"Batch price prefetch failed: {e}")
+            
+            if mini:
+                groups = [tickers[i::max_workers] for i in range(max_workers)]
+                calls = [
+                    loop.run_in_executor(pool, self.generate_mini_charts, group, days)
+                    for group in groups
+                ]
+            else:
+                groups = [[ticker] for ticker in tickers]
+                calls = [
+                    loop.run_in_executor(pool, self.generate_price_chart, ticker, days)
+                    for ticker in tickers
+                ]
+            results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        charts: Dict[str, Optional[str]] = {}
+        for group, result in zip(groups, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to generate charts for {group}: {result}")
+                result = dict.fromkeys(group)
+            elif not mini:
+                result = {group[0]: result}
+            charts.update(result)
+        return {ticker: charts.get(ticker) for ticker in tickers}
+    
     def generate_batch_charts(
         self,
         tickers: List[str],
-        days: int = 30
+        days: int = 30,
+        mini: bool = False
     ) -> Dict[str, Optional[str]]:
         """
-        批量生成图表
+        批量生成图表（同步入口，不能在运行中的事件循环内调用）
         
         Args:
             tickers: 股票代码列表
             days: 历史天数
+            mini: 是否生成迷你图
             
         Returns:
             {ticker: filepath} 映射
         """
-        results = {}
-        for ticker in tickers:
-            results[ticker] = self.generate_price_chart(ticker, days)
-        return results
+        return asyncio.run(self.agenerate_batch_charts(tickers, days, mini))
+
+
+class _MiniChartRenderer:
+    """
+    迷你图渲染器
+    
+    持有一个 Figure，多次渲染之间只清空坐标轴，避免每张图重新创建 / 销毁 Figure。
+    需在 _ensure_imports 成功后使用
+    """
+    
+    BACKGROUND = '#1a1a2e'
+    
+    def __enter__(self) -> "_MiniChartRenderer":
+        self.fig, self.ax = plt.subplots(figsize=(4, 1.5), facecolor=self.BACKGROUND)
+        # 预先铺满画布，省去 tight_layout / bbox_inches='tight' 的额外渲染
+        self.fig.subplots_adjust(left=0.01, right=0.99, bottom=0.01, top=0.99)
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        plt.close(self.fig)
+    
+    def render(self, df, filepath: Path):
+        """绘制收盘价走势并保存"""
+        ax = self.ax
+        ax.cla()
+        ax.set_facecolor(self.BACKGROUND)
+        
+        # 判断涨跌
+        is_up = df['Close'].iloc[-1] >= df['Close'].iloc[0]
+        color = '#00ff88' if is_up else '#ff4444'
+        
+        # 绘制价格线
+        ax.plot(df.index, df['Close'], color=color, linewidth=2)
+        ax.fill_between(df.index, df['Close'], alpha=0.3, color=color)
+        
+        # 隐藏坐标轴
+        ax.set_xticks([])
+        ax.set_yticks([])
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        
+        # 添加价格标注
+        current = df['Close'].iloc[-1]
+        change = ((current / df['Close'].iloc[0]) - 1) * 100
+        ax.text(
+            0.02, 0.95, f'${current:.2f}',
+            transform=ax.transAxes,
+            color='white',
+            fontsize=10,
+            fontweight='bold',
+            va='top'
+        )
+        ax.text(
+            0.98, 0.95, f'{change:+.1f}%',
+            transform=ax.transAxes,
+            color=color,
+            fontsize=9,
+            fontweight='bold',
+            va='top',
+            ha='right'
+        )
+        
+        self.fig.savefig(filepath, dpi=MINI_CHART_DPI, facecolor=self.BACKGROUND)
 
 
 # 单例实例
@@ -2,23 +2,151 @@
 import hashlib
 import re
 import unicodedata
-from typing import List, Dict, Set, Tuple, Optional
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, List, Dict, Set, Tuple, Optional
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from app.collectors.base import RawNewsData
+from app.config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-# 尝试导入 simhash，如果不可用则用简单的方法
+# 可选：numba 编译的 Jaccard 内核（优先于 scipy）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 可选：scipy 稀疏矩阵，用于 Jaccard 回退方案的批量交集计算
 try:
-    from simhash import Simhash
-    SIMHASH_AVAILABLE = True
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
 except ImportError:
-    SIMHASH_AVAILABLE = False
-    logger.warning("simhash not available, using fallback similarity method")
+    SCIPY_AVAILABLE = False
+
+
+# 每个字节值中 1 的个数（numpy < 2.0 没有 bitwise_count 时使用）
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(values: "np.ndarray") -> "np.ndarray":
+    """逐元素统计 uint64 数组中 1 的个数"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+# SimHash 特征：与 simhash 库相同，取字母 / 数字 / 汉字后按 4 字符滑窗切片，md5 摘要末 8 字节作 64-bit 特征哈希
+_SIMHASH_CHARS_RE = re.compile(r'[\w\u4e00-\u9fcc]+')
+_SIMHASH_WIDTH = 4
+
+
+def _simhash_values(texts: List[str]) -> "np.ndarray":
+    """
+    批量计算 64-bit SimHash 指纹（结果与 simhash.Simhash(text).value 一致）
+    
+    所有文本的去重特征只哈希一次，按位加权求和在一个 numpy 批次中完成
+    """
+    feature_ids: Dict[str, int] = {}
+    ids: List[int] = []
+    weights: List[int] = []
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    totals = np.zeros(len(texts), dtype=np.int64)
+    
+    for row, text in enumerate(texts):
+        content = ''.join(_SIMHASH_CHARS_RE.findall(text.lower()))
+        features = Counter(
+            content[i:i + _SIMHASH_WIDTH]
+            for i in range(max(len(content) - _SIMHASH_WIDTH + 1, 1))
+        )
+        offsets[row] = len(ids)
+        totals[row] = sum(features.values())
+        for feature, weight in features.items():
+            ids.append(feature_ids.setdefault(feature, len(feature_ids)))
+            weights.append(weight)
+    
+    digests = b''.join(hashlib.md5(feature.encode('utf-8')).digest()[-8:] for feature in feature_ids)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(-1, 64)
+    
+    weighted = bits[ids].astype(np.int64) * np.asarray(weights, dtype=np.int64)[:, None]
+    sums = np.add.reduceat(weighted, offsets, axis=0)
+    fingerprints = np.packbits(sums > totals[:, None] / 2, axis=1)
+    return fingerprints.view('>u8').ravel().astype(np.uint64)
+
+
+# 连续的非单词字符（标点 + 空白）
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+# canonicalize_url 快速路径的适用条件：http(s) 链接，且查询参数的键 / 值在 parse_qs 解码、
+# urlencode 重新编码后保持不变（只含不需转义的字符）
+_FAST_URL_SCHEMES = frozenset({"http", "https"})
+_QUERY_TOKEN_RE = re.compile(r'[A-Za-z0-9_.~-]*\Z')
+
+
+@lru_cache(maxsize=16384)
+def _normalize_title_impl(title: str) -> str:
+    """Deduplicator.normalize_title 的实现（同一标题跨阶段 / 跨运行只规范化一次）"""
+    if not title:
+        return ""
+    
+    # Unicode 规范化 + 小写
+    title = unicodedata.normalize('NFKC', title).lower()
+    
+    # 去除标点并合并空白（一次替换完成）
+    return _NON_WORD_RE.sub(' ', title).strip()
+
+
+def _token_csr(tokenized: List[Set[str]]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", int]:
+    """
+    把分词后的标题编码为 CSR 结构
+    
+    Returns:
+        (indptr, indices, sizes, vocab_size)；每行的词项 id 已升序排列
+    """
+    vocab: Dict[str, int] = {}
+    rows = [sorted(vocab.setdefault(token, len(vocab)) for token in tokens) for tokens in tokenized]
+    sizes = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    indices = np.fromiter((token for row in rows for token in row), dtype=np.int64, count=int(indptr[-1]))
+    return indptr, indices, sizes, len(vocab)
+
+
+if NUMBA_AVAILABLE:
+    # 不写签名：首次调用时才编译，未走 Jaccard 路径的进程不付编译开销
+    @njit(parallel=True)
+    def _jaccard_row(indptr, indices, sizes, threshold, i):
+        """第 i 行与其后各行的 Jaccard 相似度是否 >= threshold；行内词项 id 升序，按有序归并求交集"""
+        n = sizes.shape[0]
+        out = np.zeros(n - i - 1, dtype=np.bool_)
+        start_i = indptr[i]
+        end_i = indptr[i + 1]
+        for k in prange(n - i - 1):
+            j = i + 1 + k
+            a = start_i
+            b = indptr[j]
+            end_j = indptr[j + 1]
+            intersection = 0
+            while a < end_i and b < end_j:
+                if indices[a] == indices[b]:
+                    intersection += 1
+                    a += 1
+                    b += 1
+                elif indices[a] < indices[b]:
+                    a += 1
+                else:
+                    b += 1
+            union = sizes[i] + sizes[j] - intersection
+            similarity = intersection / union if union > 0 else 0.0
+            out[k] = similarity >= threshold
+        return out
 
 
 @dataclass
@@ -27,6 +155,7 @@ class DedupResult:
     kept_items: List[RawNewsData]  # 保留的条目
     removed_count: int  # 被移除的数量
     clusters: List["DedupClusterInfo"] = field(default_factory=list)  # 聚类信息
+    kept_canonical_urls: Set[str] = field(default_factory=set)  # 保留条目的规范化 URL（Stage 1 已算出）
 
 
 @dataclass
@@ -51,23 +180,34 @@ class Deduplicator:
     - hash(canonical_url)
     - hash(title_normalized + published_date + source)
     
-    Stage 3: 标题相似度去重 (SimHash)
+    Stage 3: 标题相似度去重 (SimHash / Jaccard，由 settings.dedup_similarity_method 选择)
     - 对于标题相似度 > threshold 的条目，保留发布时间较早的
+    - 少于 SIMHASH_MIN_TOKENS 个词的标题不参与 SimHash 比较
     """
     
     # 要移除的 URL 参数
-    TRACKING_PARAMS = {
+    TRACKING_PARAMS = frozenset({
         'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
         'ref', 'source', 'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid',
         'affiliate', 'partner', 'tracking', '_ga', 'ncid', 'sr_share'
-    }
+    })
+    
+    # 参与 SimHash 比较的标题最少词数
+    SIMHASH_MIN_TOKENS = 4
+    
+    # 可选的标题相似度算法
+    SIMILARITY_METHODS = ("simhash", "jaccard")
     
-    def __init__(self, similarity_threshold: float = 0.85):
+    def __init__(self, similarity_threshold: float = 0.85, similarity_method: Optional[str] = None):
         """
         Args:
             similarity_threshold: 相似度阈值 (0-1)，越高越严格
+            similarity_method: simhash | jaccard，默认取 settings.dedup_similarity_method
         """
         self.similarity_threshold = similarity_threshold
+        self.similarity_method = similarity_method or settings.dedup_similarity_method
+        if self.similarity_method not in self.SIMILARITY_METHODS:
+            raise ValueError(f"Unknown similarity method: {self.similarity_method}")
     
     def deduplicate(self, items: List[RawNewsData]) -> DedupResult:
         """
@@ -83,17 +223,20 @@ class Deduplicator:
         clusters: List[DedupClusterInfo] = []
         
         # Stage 1: URL 规范化去重
-        items, url_clusters = self._url_dedup(items)
+        items, url_clusters, canonical_urls = self._url_dedup(items)
         clusters.extend(url_clusters)
         logger.debug(f"After URL dedup: {len(items)} items")
         
+        # 规范化标题只计算一次，供 Stage 2 / 3 共用 {id(item): title_norm}
+        titles = {id(item): self.normalize_title(item.title) for item in items}
+        
         # Stage 2: 精确 Hash 去重
-        items, hash_clusters = self._hash_dedup(items)
+        items, hash_clusters = self._hash_dedup(items, titles)
         clusters.extend(hash_clusters)
         logger.debug(f"After hash dedup: {len(items)} items")
         
         # Stage 3: 相似度去重
-        items, sim_clusters = self._similarity_dedup(items)
+        items, sim_clusters = self._similarity_dedup(items, titles)
         clusters.extend(sim_clusters)
         logger.debug(f"After similarity dedup: {len(items)} items")
         
@@ -110,125 +253,119 @@ class Deduplicator:
         return DedupResult(
             kept_items=items,
             removed_count=removed_count,
-            clusters=clusters
+            clusters=clusters,
+            kept_canonical_urls={canonical_urls[id(item)] for item in items}
         )
     
-    def _url_dedup(self, items: List[RawNewsData]) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
-        """Stage 1: URL 规范化去重"""
-        seen: Dict[str, RawNewsData] = {}  # canonical_url -> first item
-        clusters: List[DedupClusterInfo] = []
-        duplicates: Dict[str, List[str]] = {}  # canonical_url -> list of original urls
-        
+    def _url_dedup(
+        self,
+        items: List[RawNewsData]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo], Dict[int, str]]:
+        """Stage 1: URL 规范化去重（额外返回保留条目的 {id(item): canonical_url}）"""
+        groups: Dict[str, List[RawNewsData]] = {}  # canonical_url -> items（首条为保留条目）
         for item in items:
-            canonical = self.canonicalize_url(item.url)
-            
-            if canonical in seen:
-                # 记录重复
-                if canonical not in duplicates:
-                    duplicates[canonical] = [seen[canonical].url]
-                duplicates[canonical].append(item.url)
-            else:
-                seen[canonical] = item
-        
-        # 创建聚类信息
-        for canonical, urls in duplicates.items():
-            clusters.append(DedupClusterInfo(
-                representative_url=urls[0],
-                member_urls=urls[1:],
-                method="url_exact"
-            ))
+            groups.setdefault(self.canonicalize_url(item.url), []).append(item)
         
-        return list(seen.values()), clusters
+        kept, clusters = self._collapse_groups(groups, "url_exact")
+        canonical_urls = {id(group[0]): url for url, group in groups.items()}
+        return kept, clusters, canonical_urls
     
-    def _hash_dedup(self, items: List[RawNewsData]) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+    def _hash_dedup(
+        self,
+        items: List[RawNewsData],
+        titles: Dict[int, str]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
         """Stage 2: 精确 Hash 去重（标题+日期+来源）"""
-        seen: Dict[str, RawNewsData] = {}  # content_hash -> first item
-        clusters: List[DedupClusterInfo] = []
-        duplicates: Dict[str, List[str]] = {}
-        
+        groups: Dict[str, List[RawNewsData]] = {}  # content_hash -> items
         for item in items:
-            content_hash = self.compute_content_hash(item)
-            
-            if content_hash in seen:
-                if content_hash not in duplicates:
-                    duplicates[content_hash] = [seen[content_hash].url]
-                duplicates[content_hash].append(item.url)
-            else:
-                seen[content_hash] = item
+            title_norm = titles[id(item)]
+            # 无标题的条目（常见于部分 RSS）各自成组，避免同日同源的无标题条目被误判为同一条
+            key = self.compute_content_hash(item, title_norm) if title_norm else f"__notitle__:{id(item)}"
+            groups.setdefault(key, []).append(item)
         
-        for content_hash, urls in duplicates.items():
-            clusters.append(DedupClusterInfo(
-                representative_url=urls[0],
-                member_urls=urls[1:],
-                method="hash_match"
-            ))
+        return self._collapse_groups(groups, "hash_match")
+    
+    def _collapse_groups(
+        self,
+        groups: Dict[str, List[RawNewsData]],
+        method: str
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+        """每组保留首条，其余条目记入聚类信息"""
+        kept: List[RawNewsData] = []
+        clusters: List[DedupClusterInfo] = []
+        
+        for group in groups.values():
+            kept.append(group[0])
+            if len(group) > 1:
+                clusters.append(DedupClusterInfo(
+                    representative_url=group[0].url,
+                    member_urls=[item.url for item in group[1:]],
+                    method=method
+                ))
         
-        return list(seen.values()), clusters
+        return kept, clusters
     
-    def _similarity_dedup(self, items: List[RawNewsData]) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+    def _similarity_dedup(
+        self,
+        items: List[RawNewsData],
+        titles: Dict[int, str]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
         """Stage 3: 标题相似度去重"""
         if len(items) <= 1:
             return items, []
         
-        if SIMHASH_AVAILABLE:
-            return self._simhash_dedup(items)
+        if self.similarity_method == "simhash":
+            return self._simhash_dedup(items, titles)
         else:
-            return self._simple_similarity_dedup(items)
+            return self._simple_similarity_dedup(items, titles)
     
-    def _simhash_dedup(self, items: List[RawNewsData]) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+    def _simhash_dedup(
+        self,
+        items: List[RawNewsData],
+        titles: Dict[int, str]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
         """使用 SimHash 进行相似度去重"""
-        # 计算每个条目的 SimHash
-        hashes: List[Tuple[RawNewsData, Simhash]] = []
+        # 批量计算每个条目的 SimHash
+        # 无标题或过短（SimHash 在极短文本上区分度很差）的标题不参与比较，原样保留
+        titled: List[Tuple[RawNewsData, str]] = []
+        skipped: List[RawNewsData] = []
         for item in items:
-            title_norm = self.normalize_title(item.title)
-            if title_norm:
-                sh = Simhash(title_norm)
-                hashes.append((item, sh))
+            title_norm = titles[id(item)]
+            if title_norm.count(' ') + 1 >= self.SIMHASH_MIN_TOKENS:
+                titled.append((item, title_norm))
+            else:
+                skipped.append(item)
+        if not titled:
+            return skipped, []
         
-        # 找出相似的条目
-        kept: List[RawNewsData] = []
-        clusters: List[DedupClusterInfo] = []
-        removed: Set[int] = set()
+        # 64-bit 指纹数组，每个保留条目与其后所有条目的汉明距离一次向量运算得出
+        values = _simhash_values([title_norm for _, title_norm in titled])
         
-        for i, (item_i, hash_i) in enumerate(hashes):
-            if i in removed:
-                continue
-            
-            similar_items = [item_i.url]
-            
-            for j, (item_j, hash_j) in enumerate(hashes[i+1:], start=i+1):
-                if j in removed:
-                    continue
-                
-                # SimHash 距离（汉明距离）
-                distance = hash_i.distance(hash_j)
-                # 转换为相似度 (SimHash 是 64-bit，最大距离 64)
-                similarity = 1 - (distance / 64)
-                
-                if similarity >= self.similarity_threshold:
-                    similar_items.append(item_j.url)
-                    removed.add(j)
-            
-            kept.append(item_i)
-            
-            if len(similar_items) > 1:
-                clusters.append(DedupClusterInfo(
-                    representative_url=similar_items[0],
-                    member_urls=similar_items[1:],
-                    method="similarity",
-                    similarity_score=self.similarity_threshold
-                ))
+        def similar_after(i: int) -> "np.ndarray":
+            # SimHash 距离（汉明距离），转换为相似度 (SimHash 是 64-bit，最大距离 64)
+            distance = _popcount64(values[i+1:] ^ values[i])
+            return 1 - (distance / 64) >= self.similarity_threshold
         
-        return kept, clusters
+        kept, clusters = self._merge_similar([item for item, _ in titled], similar_after)
+        return kept + skipped, clusters
     
-    def _simple_similarity_dedup(self, items: List[RawNewsData]) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+    def _simple_similarity_dedup(
+        self,
+        items: List[RawNewsData],
+        titles: Dict[int, str]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
         """简单的相似度去重（基于 Jaccard 相似度）"""
         kept: List[RawNewsData] = []
         clusters: List[DedupClusterInfo] = []
         removed: Set[int] = set()
         
         # 预处理：分词
-        tokenized = [set(self.normalize_title(item.title).split()) for item in items]
+        tokenized = [set(titles[id(item)].split()) for item in items]
+        
+        if NUMBA_AVAILABLE:
+            return self._jit_jaccard_dedup(items, tokenized)
+        if SCIPY_AVAILABLE:
+            return self._sparse_jaccard_dedup(items, tokenized)
         
         for i, item_i in enumerate(items):
             if i in removed:
@@ -267,6 +404,81 @@ class Deduplicator:
         
         return kept, clusters
     
+    def _sparse_jaccard_dedup(
+        self,
+        items: List[RawNewsData],
+        tokenized: List[Set[str]]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+        """
+        Jaccard 去重的稀疏矩阵实现
+        
+        标题构成 0/1 词项矩阵 X（每行一条），交集 = X @ X.T，
+        Jaccard = 交集 / (|A| + |B| - 交集)；保留 / 合并规则与逐对比较一致
+        """
+        indptr, indices, sizes, vocab_size = _token_csr(tokenized)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(len(items), max(vocab_size, 1))
+        )
+        intersections = (matrix @ matrix.T).tocsr()
+        
+        def similar_after(i: int) -> "np.ndarray":
+            # 与后续条目的交集 / 并集（任一方无词时并集按 1 计，相似度为 0）
+            intersection = intersections[i].toarray().ravel()[i+1:]
+            union = sizes[i] + sizes[i+1:] - intersection
+            return intersection / np.maximum(union, 1) >= self.similarity_threshold
+        
+        return self._merge_similar(items, similar_after)
+    
+    def _jit_jaccard_dedup(
+        self,
+        items: List[RawNewsData],
+        tokenized: List[Set[str]]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+        """Jaccard 去重的 numba 实现：编译后的并行内核逐行计算（只算保留条目所在行，内存 O(n)）"""
+        indptr, indices, sizes, _ = _token_csr(tokenized)
+        threshold = float(self.similarity_threshold)
+        
+        def similar_after(i: int) -> "np.ndarray":
+            return _jaccard_row(indptr, indices, sizes, threshold, i)
+        
+        return self._merge_similar(items, similar_after)
+    
+    def _merge_similar(
+        self,
+        items: List[RawNewsData],
+        similar_after: Callable[[int], "np.ndarray"]
+    ) -> Tuple[List[RawNewsData], List[DedupClusterInfo]]:
+        """
+        按顺序保留条目，并把其后与之相似、且尚未被合并的条目并入它的聚类
+        
+        Args:
+            items: 待去重条目
+            similar_after: similar_after(i) 返回 items[i+1:] 中各条目是否与 items[i] 相似的布尔数组
+        """
+        kept: List[RawNewsData] = []
+        clusters: List[DedupClusterInfo] = []
+        removed = np.zeros(len(items), dtype=bool)
+        
+        for i, item_i in enumerate(items):
+            if removed[i]:
+                continue
+            
+            similar = np.flatnonzero(similar_after(i) & ~removed[i+1:]) + i + 1
+            removed[similar] = True
+            
+            kept.append(item_i)
+            
+            if len(similar):
+                clusters.append(DedupClusterInfo(
+                    representative_url=item_i.url,
+                    member_urls=[items[j].url for j in similar],
+                    method="similarity",
+                    similarity_score=self.similarity_threshold
+                ))
+        
+        return kept, clusters
+    
     def canonicalize_url(self, url: str) -> str:
         """
         URL 规范化
@@ -277,6 +489,42 @@ class Deduplicator:
         if not url:
             return ""
         
+        # 快速路径：按字符串切分，不解码 / 重新编码查询参数。
+        # 规范化 URL 会存库并跨运行按它查重，因此只在结果与下方 urllib 路径完全一致时使用：
+        # 查询参数需无需转义、且键不重复（parse_qs 会把同名参数归并到一起）
+        scheme_end = url.find("://")
+        if (
+            scheme_end > 0
+            and url[:scheme_end].lower() in _FAST_URL_SCHEMES
+            and "\t" not in url and "\r" not in url and "\n" not in url
+        ):
+            rest = url[scheme_end + 3:].partition("#")[0]
+            rest, _, query = rest.partition("?")
+            slash = rest.find("/")
+            netloc, path = (rest, "") if slash < 0 else (rest[:slash], rest[slash:])
+            
+            # 路径参数（;）、IPv6 地址、空 host 等少见格式交给 urllib 处理
+            if netloc and ";" not in path and "[" not in netloc and "]" not in netloc:
+                tracking = self.TRACKING_PARAMS
+                kept_params: List[str] = []
+                seen_keys: Set[str] = set()
+                simple = True
+                for param in query.split("&") if query else ():
+                    key, _, value = param.partition("=")
+                    if not value or key.lower() in tracking:
+                        continue
+                    if key in seen_keys or not _QUERY_TOKEN_RE.match(key) or not _QUERY_TOKEN_RE.match(value):
+                        simple = False
+                        break
+                    seen_keys.add(key)
+                    kept_params.append(param)
+                
+                if simple:
+                    canonical = f"{url[:scheme_end].lower()}://{netloc.lower()}{path.rstrip('/')}"
+                    if kept_params:
+                        canonical = f"{canonical}?{'&'.join(kept_params)}"
+                    return canonical
+        
         try:
             parsed = urlparse(url)
             
@@ -315,37 +563,29 @@ class Deduplicator:
         - 去除多余空格
         - Unicode 规范化
         """
-        if not title:
-            return ""
-        
-        # Unicode 规范化
-        title = unicodedata.normalize('NFKC', title)
-        
-        # 小写
-        title = title.lower()
-        
-        # 去除标点（保留字母数字空格）
-        title = re.sub(r'[^\w\s]', ' ', title)
-        
-        # 去除多余空格
-        title = ' '.join(title.split())
-        
-        return title
+        return _normalize_title_impl(title or "")
     
-    def compute_content_hash(self, item: RawNewsData) -> str:
+    def compute_content_hash(self, item: RawNewsData, title_norm: Optional[str] = None) -> str:
         """
-        计算内容哈希
+        计算内容哈希（BLAKE2b-128，结果存入 NewsItem.content_hash，算法须固定不随环境变化）
         hash(title_normalized + published_date + source)
+        
+        Args:
+            item: 新闻条目
+            title_norm: 已规范化的标题（不传则现算）
         """
-        title_norm = self.normalize_title(item.title)
+        if title_norm is None:
+            title_norm = self.normalize_title(item.title)
         
         # 日期格式化到天
         date_str = ""
         if item.published_at:
             date_str = item.published_at.strftime("%Y-%m-%d")
         
-        source = item.source or ""
-        
-        content = f"{title_norm}|{date_str}|{source}"
+        content = b"|".join((
+            title_norm.encode('utf-8'),
+            date_str.encode('ascii'),
+            (item.source or "").encode('utf-8')
+        ))
         
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return hashlib.blake2b(content, digest_size=16, usedforsecurity=False).hexdigest()
@@ -0,0 +1,40 @@
+"""文件写入工具 - 临时文件 + os.replace 原子替换"""
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+@contextmanager
+def atomic_replace(path: Path, mode: int = 0o644) -> Iterator[int]:
+    """
+    先写同目录临时文件，正常退出后原子替换 path
+    
+    并发读者只会看到完整的旧文件或新文件；中途异常时删除临时文件，原文件不变
+    
+    Yields:
+        临时文件的文件描述符（退出时关闭）
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            yield fd
+        finally:
+            os.close(fd)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8"):
+    """原子地写入文本文件（见 atomic_replace）"""
+    with atomic_replace(path) as fd:
+        with open(fd, "w", encoding=encoding, closefd=False) as f:
+            f.write(text)
@@ -5,6 +5,7 @@ from typing import Optional
 from contextvars import ContextVar
 from uuid import UUID, uuid4
 
+import orjson
 import structlog
 
 
@@ -33,6 +34,11 @@ def add_run_id(logger: logging.Logger, method_name: str, event_dict: dict) -> di
     return event_dict
 
 
+def _orjson_dumps(obj, default=None, **kwargs) -> str:
+    """JSONRenderer 的序列化函数：orjson 输出 bytes，标准库 logging 需要 str"""
+    return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 def setup_logging(debug: bool = False) -> None:
     """配置 structlog 日志"""
     
@@ -46,6 +52,8 @@ def setup_logging(debug: bool = False) -> None:
     # 配置 structlog
     structlog.configure(
         processors=[
+            # 低于当前级别的日志在进入后续处理器前丢弃
+            structlog.stdlib.filter_by_level,
             structlog.contextvars.merge_contextvars,
             structlog.stdlib.add_log_level,
             structlog.stdlib.add_logger_name,
@@ -54,7 +62,7 @@ def setup_logging(debug: bool = False) -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.dev.ConsoleRenderer() if debug else structlog.processors.JSONRenderer(),
+            structlog.dev.ConsoleRenderer() if debug else structlog.processors.JSONRenderer(serializer=_orjson_dumps),
         ],
         wrapper_class=structlog.stdlib.BoundLogger,
         context_class=dict,
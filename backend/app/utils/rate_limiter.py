@@ -1,12 +1,12 @@
 """统一限流器 + 重试策略 - 所有外部 API 调用都走这个中间层"""
 import asyncio
 import random
-from typing import Any, Callable, Dict, Optional, TypeVar
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 from dataclasses import dataclass
 from functools import wraps
 
 import httpx
-from aiolimiter import AsyncLimiter
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -39,6 +39,28 @@ class RateLimitError(Exception):
         self.retry_after = retry_after
 
 
+class _FastLimiter:
+    """
+    按固定间隔放行的轻量限流器（与 AsyncLimiter 的 acquire 接口兼容）
+    
+    只记录下一次允许请求的时间点：预约与更新之间没有 await，
+    在单个事件循环内天然原子，无需锁或等待队列
+    """
+    
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self._interval = per / rate
+        self._next = 0.0
+    
+    async def acquire(self):
+        now = time.monotonic()
+        wait_time = self._next - now
+        self._next = max(now, self._next) + self._interval
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+
 class RateLimiter:
     """
     统一限流器 - 支持不同 API 的配置
@@ -66,13 +88,13 @@ class RateLimiter:
     }
     
     def __init__(self):
-        self._limiters: Dict[str, AsyncLimiter] = {}
+        self._limiters: Dict[str, _FastLimiter] = {}
         self._init_limiters()
     
     def _init_limiters(self):
         """初始化各 API 的限流器"""
         for api_name, config in self.CONFIGS.items():
-            self._limiters[api_name] = AsyncLimiter(config.rate, config.per)
+            self._limiters[api_name] = _FastLimiter(config.rate, config.per)
     
     def get_config(self, api_name: str) -> RateLimitConfig:
         """获取 API 配置"""
@@ -83,7 +105,7 @@ class RateLimiter:
     def update_config(self, api_name: str, config: RateLimitConfig):
         """更新 API 配置（运行时动态调整）"""
         self.CONFIGS[api_name] = config
-        self._limiters[api_name] = AsyncLimiter(config.rate, config.per)
+        self._limiters[api_name] = _FastLimiter(config.rate, config.per)
     
     async def acquire(self, api_name: str):
         """获取令牌（阻塞直到可用）"""
@@ -249,11 +271,17 @@ def rate_limited(api_name: str, max_retries: int = 3):
     return decorator
 
 
+# 共享的 HTTP 客户端 {(base_url, user_agent, timeout): client}，同一 API 的所有实例复用连接池
+_CLIENT_REGISTRY: Dict[Tuple[str, Optional[str], float], httpx.AsyncClient] = {}
+
+
 class RateLimitedClient:
     """
     带限流的 HTTP 客户端基类
     
-    子类只需要指定 api_name 和 base_url
+    子类只需要指定 api_name 和 base_url；
+    底层 httpx.AsyncClient 按 base_url 共享，应用退出时由 aclose_all 统一关闭；
+    子类覆盖 client 自建的私有客户端不进入共享表，由 close() 直接关闭
     """
     
     api_name: str = "default"
@@ -263,27 +291,49 @@ class RateLimitedClient:
     def __init__(self):
         self.config = rate_limiter.get_config(self.api_name)
         self._client: Optional[httpx.AsyncClient] = None
+        # 外部注入的客户端由调用方负责关闭
+        self._owns_client = True
     
     @property
     def client(self) -> httpx.AsyncClient:
-        """懒加载 HTTP 客户端"""
-        if self._client is None:
-            headers = {}
-            if self.config.user_agent_required and self.config.user_agent:
-                headers["User-Agent"] = self.config.user_agent
+        """懒加载（共享的）HTTP 客户端"""
+        if self._client is None or self._client.is_closed:
+            user_agent = self.config.user_agent if self.config.user_agent_required else None
+            key = (self.base_url, user_agent, self.timeout)
             
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=self.timeout,
-                headers=headers,
-            )
+            client = _CLIENT_REGISTRY.get(key)
+            if client is None or client.is_closed:
+                headers = {"User-Agent": user_agent} if user_agent else {}
+                client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=self.timeout,
+                    headers=headers,
+                    limits=httpx.Limits(
+                        max_connections=100,
+                        max_keepalive_connections=20,
+                        keepalive_expiry=30.0
+                    ),
+                )
+                _CLIENT_REGISTRY[key] = client
+            self._client = client
         return self._client
     
     async def close(self):
-        """关闭客户端"""
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        """释放客户端：共享客户端只释放引用（连接池保持复用，由 aclose_all 关闭），自建的私有客户端直接关闭"""
+        client, self._client = self._client, None
+        if client is None or not self._owns_client:
+            return
+        if any(client is shared for shared in _CLIENT_REGISTRY.values()):
+            return
+        await client.aclose()
+    
+    @classmethod
+    async def aclose_all(cls):
+        """关闭所有共享的 HTTP 客户端（应用退出时调用）"""
+        clients = list(_CLIENT_REGISTRY.values())
+        _CLIENT_REGISTRY.clear()
+        for client in clients:
+            await client.aclose()
     
     async def get(self, path: str, **kwargs) -> httpx.Response:
         """带限流的 GET 请求"""
@@ -0,0 +1,124 @@
+"""RPM + TPM 双令牌桶 - LLM 调用前主动节流，避免 429 后盲目重试"""
+import asyncio
+import time
+from functools import lru_cache
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 可选：tiktoken BPE 编码器（OpenAI / Gemini 的分词都与 cl100k 足够接近，用于预算）
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# 无 tiktoken 时的粗略估算：4 字符 ≈ 1 token
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    首次估算时才加载编码表（本地缓存为空时需联网下载，不能放在导入阶段）
+    
+    加载失败时返回 None，进程内改用字符数估算
+    """
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except (OSError, ValueError) as e:
+        logger.warning("tiktoken encoding unavailable, estimating tokens by length", error=str(e))
+        return None
+
+
+@lru_cache(maxsize=2048)
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数（同一 prompt 只计算一次）"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """
+    按分钟额度匀速补充的请求数 / token 数双令牌桶
+    
+    用法:
+        reserved = await bucket.reserve(estimated_tokens)
+        ... 调用 API ...
+        bucket.reconcile(reserved, actual_tokens)
+    
+    收到 429 时调用 penalize()，在一段时间内按比例收紧额度
+    """
+    
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._scale = 1.0
+        self._penalty_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _caps(self, now: float):
+        """当前生效的 (rpm, tpm) 额度（处于惩罚期时按比例缩小）"""
+        scale = self._scale if now < self._penalty_until else 1.0
+        return self.rpm * scale, self.tpm * scale
+    
+    def _refill(self, now: float):
+        rpm_cap, tpm_cap = self._caps(now)
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(rpm_cap, self._requests + elapsed * rpm_cap / 60)
+        self._tokens = min(tpm_cap, self._tokens + elapsed * tpm_cap / 60)
+    
+    async def reserve(self, tokens: int) -> int:
+        """
+        预占 1 个请求和 tokens 个 token，额度不足时等待补充
+        
+        Returns:
+            实际预占的 token 数（单个请求超过当前整桶容量时按整桶计）
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                # 惩罚期内桶容量缩小，按当前容量截断，否则大请求在惩罚期内永远装不下
+                rpm_cap, tpm_cap = self._caps(now)
+                reserved = min(tokens, tpm_cap)
+                if self._requests >= 1 and self._tokens >= reserved:
+                    self._requests -= 1
+                    self._tokens -= reserved
+                    return int(reserved)
+                
+                wait_time = max(
+                    (1 - self._requests) * 60 / rpm_cap,
+                    (reserved - self._tokens) * 60 / tpm_cap,
+                    0.01
+                )
+                # 持锁等待会阻塞其他调用方：惩罚期结束时额度恢复，届时重新计算
+                if now < self._penalty_until:
+                    wait_time = min(wait_time, max(self._penalty_until - now, 0.01))
+                await asyncio.sleep(wait_time)
+    
+    def reconcile(self, reserved: int, actual: int):
+        """按实际用量修正预占（多退少补，允许暂时透支）"""
+        self._tokens = min(self._caps(time.monotonic())[1], self._tokens + reserved - actual)
+    
+    def penalize(self, factor: float = 0.9, duration: float = 30.0):
+        """收到 429：在 duration 秒内把额度收紧到 factor 倍（连续触发时叠加）"""
+        now = time.monotonic()
+        self._refill(now)
+        base = self._scale if now < self._penalty_until else 1.0
+        self._scale = max(base * factor, 0.1)
+        self._penalty_until = now + duration
+        logger.warning(
+            "Rate limited, tightening token bucket",
+            scale=round(self._scale, 3),
+            duration_seconds=duration
+        )
@@ -1,12 +1,57 @@
 """Pytest configuration and fixtures"""
-import pytest
+import os
 import asyncio
-from typing import Generator
+from typing import Iterable
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    """Create event loop for async tests"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+# Point the app at an in-memory database before app.config is imported by any
+# test module; every xdist worker is its own process, so each gets its own database
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import database
+
+# One shared connection keeps the in-memory schema alive for the whole session
+test_engine = create_async_engine(
+    TEST_DATABASE_URL,
+    poolclass=StaticPool,
+    connect_args={"check_same_thread": False},
+)
+
+
+@event.listens_for(test_engine.sync_engine, "connect")
+def _disable_pysqlite_begin(dbapi_connection, connection_record):
+    # pysqlite defers BEGIN on its own, which breaks SAVEPOINTs; emit it explicitly
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+database.engine = test_engine
+database.async_session_maker.configure(bind=test_engine)
+
+
+def pytest_configure(config):
+    """Register xdist_group and install uvloop before pytest-asyncio creates the session loop"""
+    config.addinivalue_line(
+        "markers", "xdist_group(name): keep tests on one worker under --dist loadgroup"
+    )
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+async def _seed(client, items: Iterable[dict], path: str = "/api/watchlist") -> list:
+    """POST independent setup items concurrently and return the responses"""
+    return await asyncio.gather(*(client.post(path, json=item) for item in items))
@@ -1,15 +1,24 @@
 """Tests for REST API endpoints"""
+import asyncio
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
+from app.api.watchlist import get_watchlist, get_watchlist_item
 from app.main import app
-from app.models.database import init_db, Base, engine
+from app.models.database import init_db, Base, get_db
+from tests.conftest import _seed, test_engine as engine
 
 
-@pytest.fixture(autouse=True)
+# Under `pytest -n auto --dist loadgroup` all DB tests stay on one xdist worker
+pytestmark = pytest.mark.xdist_group(name="db")
+
+
+@pytest.fixture(scope="session", autouse=True)
 async def setup_database():
-    """Setup test database"""
+    """Create the test schema once per session"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -17,18 +26,71 @@ async def setup_database():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+async def db_transaction():
+    """Run each test inside an outer transaction that is rolled back afterwards
+    
+    Request sessions join the connection with SAVEPOINTs, so their commits never
+    reach the database and no per-test DDL is needed.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        # Concurrent requests (see _seed) must not interleave SAVEPOINTs on the shared connection
+        savepoint_lock = asyncio.Lock()
+        
+        async def override_get_db():
+            async with savepoint_lock, AsyncSession(
+                bind=conn,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            ) as session:
+                try:
+                    yield session
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+        
+        app.dependency_overrides[get_db] = override_get_db
+        yield conn
+        app.dependency_overrides.pop(get_db, None)
+        await trans.rollback()
+
+
 @pytest.fixture
+async def db_session(db_transaction):
+    """Session on the rolled-back test connection, for calling route functions directly"""
+    async with AsyncSession(
+        bind=db_transaction,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+    ) as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
 async def client():
-    """Async HTTP client for testing"""
+    """Async HTTP client shared by the whole session (isolation comes from db_transaction)"""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
 
+@pytest.fixture(params=[1, 5])
+async def seeded_watchlist(request, client):
+    """Seed the watchlist with N independent tickers"""
+    items = [
+        {"ticker": f"SEED{i}", "company_name": f"Seed Company {i}"}
+        for i in range(request.param)
+    ]
+    responses = await _seed(client, items)
+    assert all(r.status_code == 201 for r in responses)
+    return items
+
+
 class TestHealthEndpoint:
     """Tests for health check endpoint"""
     
-    @pytest.mark.asyncio
     async def test_health_check(self, client):
         """Test health check returns 200"""
         response = await client.get("/api/health")
@@ -42,33 +104,20 @@ class TestHealthEndpoint:
 class TestWatchlistAPI:
     """Tests for watchlist API endpoints"""
     
-    @pytest.mark.asyncio
-    async def test_get_empty_watchlist(self, client):
+    async def test_get_empty_watchlist(self, db_session):
         """Test getting empty watchlist"""
-        response = await client.get("/api/watchlist")
+        items = await get_watchlist(db=db_session)
         
-        assert response.status_code == 200
-        assert response.json() == []
+        assert items == []
     
-    @pytest.mark.asyncio
-    async def test_create_watchlist_item(self, client):
-        """Test creating a watchlist item"""
-        item_data = {
-            "ticker": "NVDA",
-            "company_name": "NVIDIA Corporation",
-            "thesis": "AI infrastructure leader",
-            "priority": 1,
-            "sector": "AI基础设施"
-        }
-        
-        response = await client.post("/api/watchlist", json=item_data)
+    async def test_list_seeded_watchlist(self, client, seeded_watchlist):
+        """Test listing returns every seeded item"""
+        response = await client.get("/api/watchlist")
         
-        assert response.status_code == 201
-        data = response.json()
-        assert data["ticker"] == "NVDA"
-        assert data["company_name"] == "NVIDIA Corporation"
+        assert response.status_code == 200
+        tickers = {item["ticker"] for item in response.json()}
+        assert tickers == {item["ticker"] for item in seeded_watchlist}
     
-    @pytest.mark.asyncio
     async def test_create_duplicate_ticker(self, client):
         """Test creating duplicate ticker returns error"""
         item_data = {
@@ -84,75 +133,68 @@ class TestWatchlistAPI:
         
         assert response.status_code == 400
     
-    @pytest.mark.asyncio
-    async def test_get_watchlist_item(self, client):
-        """Test getting a specific watchlist item"""
-        # Create item first
-        item_data = {
-            "ticker": "GOOGL",
-            "company_name": "Alphabet Inc.",
-        }
-        await client.post("/api/watchlist", json=item_data)
-        
-        # Get item
-        response = await client.get("/api/watchlist/GOOGL")
-        
-        assert response.status_code == 200
-        assert response.json()["ticker"] == "GOOGL"
-    
-    @pytest.mark.asyncio
-    async def test_get_nonexistent_item(self, client):
+    async def test_get_nonexistent_item(self, db_session):
         """Test getting nonexistent item returns 404"""
-        response = await client.get("/api/watchlist/NOTEXIST")
+        with pytest.raises(HTTPException) as exc_info:
+            await get_watchlist_item("NOTEXIST", db=db_session)
         
-        assert response.status_code == 404
+        assert exc_info.value.status_code == 404
     
-    @pytest.mark.asyncio
-    async def test_update_watchlist_item(self, client):
-        """Test updating a watchlist item"""
-        # Create item first
-        item_data = {
-            "ticker": "TSM",
-            "company_name": "Taiwan Semiconductor",
-        }
-        await client.post("/api/watchlist", json=item_data)
+    @pytest.mark.parametrize("item", [
+        {
+            "ticker": "NVDA",
+            "company_name": "NVIDIA Corporation",
+            "thesis": "AI infrastructure leader",
+            "priority": 1,
+            "sector": "AI基础设施"
+        },
+        {"ticker": "GOOGL", "company_name": "Alphabet Inc."},
+        {"ticker": "TSM", "company_name": "Taiwan Semiconductor"},
+        {"ticker": "AMD", "company_name": "AMD Inc."},
+    ])
+    async def test_watchlist_crud(self, client, item):
+        """Test create, get, update and delete round-trip for a watchlist item"""
+        ticker = item["ticker"]
+        
+        # Create
+        response = await client.post("/api/watchlist", json=item)
+        
+        assert response.status_code == 201
+        data = response.json()
+        assert data["ticker"] == ticker
+        assert data["company_name"] == item["company_name"]
+        
+        # Get
+        response = await client.get(f"/api/watchlist/{ticker}")
         
-        # Update item
+        assert response.status_code == 200
+        assert response.json()["ticker"] == ticker
+        
+        # Update
         update_data = {
             "thesis": "Advanced node monopoly",
             "priority": 1
         }
-        response = await client.put("/api/watchlist/TSM", json=update_data)
+        response = await client.put(f"/api/watchlist/{ticker}", json=update_data)
         
         assert response.status_code == 200
         data = response.json()
         assert data["thesis"] == "Advanced node monopoly"
         assert data["priority"] == 1
-    
-    @pytest.mark.asyncio
-    async def test_delete_watchlist_item(self, client):
-        """Test deleting a watchlist item"""
-        # Create item first
-        item_data = {
-            "ticker": "AMD",
-            "company_name": "AMD Inc.",
-        }
-        await client.post("/api/watchlist", json=item_data)
         
-        # Delete item
-        response = await client.delete("/api/watchlist/AMD")
+        # Delete
+        response = await client.delete(f"/api/watchlist/{ticker}")
         
         assert response.status_code == 204
         
         # Verify deleted
-        response = await client.get("/api/watchlist/AMD")
+        response = await client.get(f"/api/watchlist/{ticker}")
         assert response.status_code == 404
 
 
 class TestJobsAPI:
     """Tests for jobs API endpoints"""
     
-    @pytest.mark.asyncio
     async def test_list_jobs_empty(self, client):
         """Test listing jobs when none exist"""
         response = await client.get("/api/jobs")
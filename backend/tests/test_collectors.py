@@ -1,13 +1,32 @@
 """Tests for data collectors"""
+import httpx
 import pytest
-from datetime import datetime, timedelta
-from unittest.mock import AsyncMock, patch, MagicMock
+from datetime import datetime, timedelta, timezone
 
 from app.collectors.base import RawNewsData
 from app.collectors.finnhub import FinnhubNewsCollector, FinnhubClient
+from app.collectors.sec_edgar import SECClient
+from app.utils.rate_limiter import RateLimitedClient
 
 
-@pytest.fixture
+# Pinned publish time (timezone-aware, so it does not depend on the host TZ)
+_FIXED_TS = int(datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc).timestamp())
+
+# Read-only RawNewsData samples, built once at import
+SAMPLE_RAW_NEWS = RawNewsData(
+    source="test",
+    source_type="news",
+    url="https://example.com",
+    title="Test News",
+    tickers=["AAPL", "GOOGL"]
+)
+MINIMAL_RAW_NEWS = RawNewsData(
+    source="test",
+    source_type="news"
+)
+
+
+@pytest.fixture(scope="module")
 def sample_finnhub_response():
     """Sample Finnhub API response"""
     return [
@@ -17,7 +36,7 @@ def sample_finnhub_response():
             "summary": "NVIDIA announced record quarterly revenue of $22.1 billion.",
             "source": "Reuters",
             "url": "https://example.com/news/nvda-q4",
-            "datetime": int(datetime.utcnow().timestamp()),
+            "datetime": _FIXED_TS,
             "related": "NVDA",
             "category": "company",
             "image": "https://example.com/image.jpg"
@@ -28,7 +47,7 @@ def sample_finnhub_response():
             "summary": "Major tech stocks gained on continued AI investment.",
             "source": "Bloomberg",
             "url": "https://example.com/news/tech-rally",
-            "datetime": int(datetime.utcnow().timestamp()),
+            "datetime": _FIXED_TS,
             "related": "NVDA,AMD,GOOGL",
             "category": "market",
             "image": ""
@@ -36,14 +55,36 @@ def sample_finnhub_response():
     ]
 
 
+@pytest.fixture(scope="module")
+def collector():
+    """Finnhub collector shared by the pure parse tests"""
+    return FinnhubNewsCollector(api_key="test_key")
+
+
+@pytest.fixture(scope="module")
+async def finnhub_http(sample_finnhub_response):
+    """HTTP client whose MockTransport serves the sample company-news response"""
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/api/v1/company-news":
+            return httpx.Response(200, json=sample_finnhub_response)
+        return httpx.Response(404)
+    
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url=FinnhubClient.base_url,
+    ) as client:
+        client.requests = requests
+        yield client
+
+
 class TestFinnhubCollector:
     """Tests for FinnhubNewsCollector"""
     
-    @pytest.mark.asyncio
-    async def test_parse_news_item(self, sample_finnhub_response):
+    def test_parse_news_item(self, collector, sample_finnhub_response):
         """Test parsing of Finnhub news response"""
-        collector = FinnhubNewsCollector(api_key="test_key")
-        
         item = collector._parse_news_item(sample_finnhub_response[0], "NVDA")
         
         assert item is not None
@@ -53,11 +94,8 @@ class TestFinnhubCollector:
         assert item.title == "NVIDIA Reports Record Q4 Revenue"
         assert item.url == "https://example.com/news/nvda-q4"
     
-    @pytest.mark.asyncio
-    async def test_parse_multiple_tickers(self, sample_finnhub_response):
+    def test_parse_multiple_tickers(self, collector, sample_finnhub_response):
         """Test parsing news with multiple related tickers"""
-        collector = FinnhubNewsCollector(api_key="test_key")
-        
         item = collector._parse_news_item(sample_finnhub_response[1], "NVDA")
         
         assert item is not None
@@ -65,14 +103,63 @@ class TestFinnhubCollector:
         assert "AMD" in item.tickers
         assert "GOOGL" in item.tickers
     
-    @pytest.mark.asyncio
-    async def test_collector_attributes(self):
+    def test_collector_attributes(self, collector):
         """Test collector class attributes"""
-        collector = FinnhubNewsCollector(api_key="test_key")
-        
         assert collector.source == "finnhub"
         assert collector.source_type == "news"
         assert collector.credibility == "medium"
+    
+    async def test_collect_through_transport(self, finnhub_http):
+        """Test collect() runs the real request path against a mock transport"""
+        collector = FinnhubNewsCollector(api_key="test_key", http_client=finnhub_http)
+        
+        items = await collector.collect(
+            ["NVDA"],
+            since=datetime(2024, 1, 14),
+            until=datetime(2024, 1, 16)
+        )
+        
+        assert [item.url for item in items] == [
+            "https://example.com/news/nvda-q4",
+            "https://example.com/news/tech-rally",
+        ]
+        params = finnhub_http.requests[-1].url.params
+        assert params["symbol"] == "NVDA"
+        assert params["from"] == "2024-01-14"
+        assert params["to"] == "2024-01-16"
+        assert params["token"] == "test_key"
+
+
+class TestClientLifecycle:
+    """Tests for closing collector HTTP clients"""
+    
+    async def test_finnhub_client_closed_by_aclose_all(self):
+        """Test the Finnhub client is shared and released on shutdown"""
+        collector = FinnhubNewsCollector(api_key="test_key")
+        client = collector.client.client
+        
+        await collector.close()
+        assert not client.is_closed
+        
+        await RateLimitedClient.aclose_all()
+        assert client.is_closed
+    
+    async def test_private_client_closed_on_close(self):
+        """Test a client built by a subclass outside the registry is closed directly"""
+        sec = SECClient(user_agent="Test test@example.com")
+        client = sec.client
+        
+        await sec.close()
+        
+        assert client.is_closed
+    
+    async def test_injected_client_left_open(self, finnhub_http):
+        """Test an injected client stays owned by the caller"""
+        collector = FinnhubNewsCollector(api_key="test_key", http_client=finnhub_http)
+        
+        await collector.close()
+        
+        assert not finnhub_http.is_closed
 
 
 class TestRawNewsData:
@@ -80,13 +167,7 @@ class TestRawNewsData:
     
     def test_create_raw_news_data(self):
         """Test creating RawNewsData instance"""
-        data = RawNewsData(
-            source="test",
-            source_type="news",
-            url="https://example.com",
-            title="Test News",
-            tickers=["AAPL", "GOOGL"]
-        )
+        data = SAMPLE_RAW_NEWS
         
         assert data.source == "test"
         assert data.source_type == "news"
@@ -95,13 +176,14 @@ class TestRawNewsData:
     
     def test_default_values(self):
         """Test default values for optional fields"""
-        data = RawNewsData(
-            source="test",
-            source_type="news"
-        )
+        data = MINIMAL_RAW_NEWS
         
         assert data.url == ""
         assert data.title == ""
         assert data.tickers == []
         assert data.summary is None
         assert data.published_at is None
+    
+    def test_uses_slots(self):
+        """Test instances carry no per-instance __dict__"""
+        assert not hasattr(SAMPLE_RAW_NEWS, "__dict__")
@@ -3,6 +3,7 @@ import pytest
 from datetime import datetime
 
 from app.collectors.base import RawNewsData
+from app.config import settings
 from app.utils.deduplicator import Deduplicator
 
 
@@ -11,43 +12,47 @@ def deduplicator():
     return Deduplicator(similarity_threshold=0.85)
 
 
-@pytest.fixture
+# Read-only sample items, built once at import
+SAMPLE_NEWS_ITEMS = [
+    RawNewsData(
+        source="finnhub",
+        source_type="news",
+        url="https://example.com/news/1?utm_source=twitter&ref=123",
+        title="NVIDIA Reports Record Q4 Revenue of $22 Billion",
+        published_at=datetime(2024, 1, 15, 10, 0),
+        tickers=["NVDA"]
+    ),
+    RawNewsData(
+        source="finnhub",
+        source_type="news",
+        url="https://example.com/news/1",  # Same URL without tracking
+        title="NVIDIA Reports Record Q4 Revenue of $22 Billion",
+        published_at=datetime(2024, 1, 15, 10, 0),
+        tickers=["NVDA"]
+    ),
+    RawNewsData(
+        source="polygon",
+        source_type="news",
+        url="https://other.com/nvda-q4",
+        title="NVIDIA Q4 Revenue Hits Record $22B",  # Similar but different
+        published_at=datetime(2024, 1, 15, 10, 30),
+        tickers=["NVDA"]
+    ),
+    RawNewsData(
+        source="finnhub",
+        source_type="news",
+        url="https://example.com/news/2",
+        title="AMD Announces New GPU Architecture",  # Different news
+        published_at=datetime(2024, 1, 15, 11, 0),
+        tickers=["AMD"]
+    ),
+]
+
+
+@pytest.fixture(scope="module")
 def sample_news_items():
     """Sample news items for testing"""
-    return [
-        RawNewsData(
-            source="finnhub",
-            source_type="news",
-            url="https://example.com/news/1?utm_source=twitter&ref=123",
-            title="NVIDIA Reports Record Q4 Revenue of $22 Billion",
-            published_at=datetime(2024, 1, 15, 10, 0),
-            tickers=["NVDA"]
-        ),
-        RawNewsData(
-            source="finnhub",
-            source_type="news",
-            url="https://example.com/news/1",  # Same URL without tracking
-            title="NVIDIA Reports Record Q4 Revenue of $22 Billion",
-            published_at=datetime(2024, 1, 15, 10, 0),
-            tickers=["NVDA"]
-        ),
-        RawNewsData(
-            source="polygon",
-            source_type="news",
-            url="https://other.com/nvda-q4",
-            title="NVIDIA Q4 Revenue Hits Record $22B",  # Similar but different
-            published_at=datetime(2024, 1, 15, 10, 30),
-            tickers=["NVDA"]
-        ),
-        RawNewsData(
-            source="finnhub",
-            source_type="news",
-            url="https://example.com/news/2",
-            title="AMD Announces New GPU Architecture",  # Different news
-            published_at=datetime(2024, 1, 15, 11, 0),
-            tickers=["AMD"]
-        ),
-    ]
+    return SAMPLE_NEWS_ITEMS
 
 
 class TestDeduplicator:
@@ -63,6 +68,16 @@ class TestDeduplicator:
         assert "page=1" in canonical
         assert "example.com" in canonical.lower()
     
+    @pytest.mark.parametrize("url,expected", [
+        ("https://example.com/a?q=a%20b", "https://example.com/a?q=a+b"),
+        ("https://example.com/a?q=a+b&x=1&q=c", "https://example.com/a?q=a+b&q=c&x=1"),
+        ("https://Example.com/a/?id=5&utm_source=tw#top", "https://example.com/a?id=5"),
+        ("https://example.com/a?empty=&id=5", "https://example.com/a?id=5"),
+    ])
+    def test_canonicalize_url_matches_stored_form(self, deduplicator, url, expected):
+        """Test canonical URLs keep the decoded/re-encoded, key-grouped form stored in the DB"""
+        assert deduplicator.canonicalize_url(url) == expected
+    
     def test_normalize_title(self, deduplicator):
         """Test title normalization"""
         title = "NVIDIA Reports Record Q4 Revenue!!!"
@@ -82,15 +97,31 @@ class TestDeduplicator:
         # Same title + date + source should produce same hash
         assert hash1 == hash2
     
+    def test_content_hash_batch(self, deduplicator):
+        """Test hashing many items yields stable, distinct 128-bit digests"""
+        items = [
+            RawNewsData(
+                source="finnhub",
+                source_type="news",
+                url=f"https://example.com/news/{i}",
+                title=f"Market update number {i}",
+                published_at=datetime(2024, 1, 15, 10, 0),
+            )
+            for i in range(10_000)
+        ]
+        
+        hashes = [deduplicator.compute_content_hash(item) for item in items]
+        
+        assert len(set(hashes)) == len(items)
+        assert all(len(h) == 32 for h in hashes)
+        assert hashes == [deduplicator.compute_content_hash(item) for item in items]
+    
     def test_url_dedup(self, deduplicator, sample_news_items):
         """Test URL deduplication"""
         result = deduplicator.deduplicate(sample_news_items)
         
         # Should remove the duplicate URL
-        urls = [item.url for item in result.kept_items]
-        unique_urls = set(deduplicator.canonicalize_url(u) for u in urls)
-        
-        assert len(unique_urls) == len(result.kept_items)
+        assert len(result.kept_canonical_urls) == len(result.kept_items)
     
     def test_dedup_preserves_unique_news(self, deduplicator, sample_news_items):
         """Test that unique news items are preserved"""
@@ -113,3 +144,64 @@ class TestDeduplicator:
         
         assert result.kept_items == []
         assert result.removed_count == 0
+    
+    def test_untitled_items_not_merged(self, deduplicator):
+        """Test that items without a title are kept instead of collapsing into one"""
+        items = [
+            RawNewsData(
+                source="rss",
+                source_type="news",
+                url=f"https://example.com/untitled/{i}",
+                title="",
+                published_at=datetime(2024, 1, 15, 10, 0),
+                tickers=["NVDA"]
+            )
+            for i in range(3)
+        ]
+        result = deduplicator.deduplicate(items)
+        
+        assert len(result.kept_items) == 3
+        assert result.removed_count == 0
+        
+        # The stored content hash stays deterministic for untitled items
+        hashes = {deduplicator.compute_content_hash(item) for item in items}
+        assert len(hashes) == 1
+        assert "__notitle__" not in hashes.pop()
+    
+    def test_short_titles_skip_simhash(self, deduplicator):
+        """Test that very short titles are kept as-is by the SimHash stage"""
+        items = [
+            RawNewsData(
+                source="finnhub",
+                source_type="news",
+                url=f"https://example.com/short/{i}",
+                title=title,
+                published_at=datetime(2024, 1, 15, 10, 0),
+                tickers=["NVDA"]
+            )
+            for i, title in enumerate(["NVDA up", "NVDA up!", "NVDA rallies"])
+        ]
+        result = deduplicator.deduplicate(items)
+        
+        # "NVDA up" / "NVDA up!" are exact hash matches; the rest are never compared by SimHash
+        assert len(result.kept_items) == 2
+        assert all(c.method != "similarity" for c in result.clusters)
+    
+    @pytest.mark.parametrize("method", ["simhash", "jaccard"])
+    def test_similarity_method_from_settings(self, monkeypatch, method):
+        """Test the similarity algorithm follows settings.dedup_similarity_method"""
+        monkeypatch.setattr(settings, "dedup_similarity_method", method)
+        dedup = Deduplicator(similarity_threshold=0.85)
+        
+        calls = []
+        monkeypatch.setattr(dedup, "_simhash_dedup", lambda items, titles: calls.append("simhash") or (items, []))
+        monkeypatch.setattr(dedup, "_simple_similarity_dedup", lambda items, titles: calls.append("jaccard") or (items, []))
+        dedup.deduplicate(SAMPLE_NEWS_ITEMS)
+        
+        assert dedup.similarity_method == method
+        assert calls == [method]
+    
+    def test_unknown_similarity_method(self):
+        """Test an unknown similarity method is rejected"""
+        with pytest.raises(ValueError):
+            Deduplicator(similarity_method="minhash")
@@ -0,0 +1,75 @@
+"""Scaling benchmarks for deduplicator (deselected by default; run with `pytest -m slow`)"""
+import random
+import string
+import time
+import pytest
+from datetime import datetime
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+from app.collectors.base import RawNewsData
+from app.utils.deduplicator import Deduplicator
+
+
+def _synthetic_items(n: int, seed: int = 0) -> list:
+    """Generate n news items; every tenth one re-posts an earlier title under a new URL"""
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(5000)
+    ]
+    published_at = datetime(2024, 1, 15, 10, 0)
+    
+    items = []
+    for i in range(n):
+        if i % 10 == 9:
+            title = items[rng.randrange(i)].title
+        else:
+            title = " ".join(rng.choices(words, k=rng.randint(5, 12)))
+        items.append(RawNewsData(
+            source="finnhub",
+            source_type="news",
+            url=f"https://example.com/news/{i}",
+            title=title,
+            published_at=published_at,
+            tickers=["NVDA"]
+        ))
+    return items
+
+
+def _best_time(func, *args, repeat: int = 3) -> float:
+    """Best wall time of several runs (least affected by scheduler noise)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.fixture(scope="module")
+def deduplicator():
+    return Deduplicator(similarity_threshold=0.85)
+
+
+@pytest.mark.parametrize("n", [1_000, 10_000])
+def test_deduplicate_benchmark(benchmark, deduplicator, n):
+    """Benchmark a full three-stage dedup run"""
+    items = _synthetic_items(n)
+    
+    result = benchmark.pedantic(deduplicator.deduplicate, args=(items,), rounds=3)
+    
+    assert result.removed_count >= n // 10
+    assert len(result.kept_items) + result.removed_count == n
+
+
+def test_per_item_time_does_not_grow(deduplicator):
+    """Per-item cost at 10k items stays within a constant factor of 1k"""
+    small, large = _synthetic_items(1_000), _synthetic_items(10_000)
+    
+    per_item_small = _best_time(deduplicator.deduplicate, small) / len(small)
+    per_item_large = _best_time(deduplicator.deduplicate, large) / len(large)
+    
+    assert per_item_large < per_item_small * 3
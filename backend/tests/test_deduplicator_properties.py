@@ -0,0 +1,53 @@
+"""Property-based tests for deduplicator normalization helpers"""
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, strategies as st
+
+from app.utils.deduplicator import Deduplicator
+
+
+# Pure helpers: one shared instance, no fixtures needed per example
+deduplicator = Deduplicator(similarity_threshold=0.85)
+
+_HOST_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-."
+_PATH_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-._~/"
+
+_query_params = st.lists(
+    st.tuples(
+        st.sampled_from(["id", "page", "q", "utm_source", "utm_medium", "ref", "fbclid", "source"]),
+        st.text(st.sampled_from(_PATH_CHARS[:-1]), max_size=8),
+    ),
+    max_size=5,
+).map(lambda params: "&".join(f"{key}={value}" for key, value in params))
+
+urls = st.builds(
+    lambda scheme, host, path, qs: f"{scheme}://{host}/{path}?{qs}",
+    st.sampled_from(["http", "https", "HTTPS"]),
+    st.text(st.sampled_from(_HOST_CHARS), min_size=1, max_size=20),
+    st.text(st.sampled_from(_PATH_CHARS), max_size=30),
+    _query_params,
+)
+
+titles = st.text(st.characters(blacklist_categories=["Cs"]))
+
+
+@given(urls)
+def test_canonicalize_url_idempotent(url):
+    """Canonicalizing an already canonical URL changes nothing"""
+    canonical = deduplicator.canonicalize_url(url)
+    
+    assert deduplicator.canonicalize_url(canonical) == canonical
+    assert "utm_source=" not in canonical
+    assert "fbclid=" not in canonical
+
+
+@given(titles)
+def test_normalize_title_lowercase_without_punctuation(title):
+    """Normalized titles are lowercase word characters joined by single spaces"""
+    normalized = deduplicator.normalize_title(title)
+    
+    assert normalized == normalized.lower()
+    assert normalized == normalized.strip()
+    assert "  " not in normalized
+    assert all(c.isalnum() or c in "_ " for c in normalized)
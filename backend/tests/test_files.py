@@ -0,0 +1,28 @@
+"""Tests for atomic file writes"""
+import pytest
+
+from app.utils.files import atomic_replace, atomic_write_text
+
+
+def test_atomic_write_text_replaces_file(tmp_path):
+    """Test the new content replaces the old file and no temp file is left behind"""
+    path = tmp_path / "cache.json"
+    path.write_text("old", encoding="utf-8")
+    
+    atomic_write_text(path, "新内容")
+    
+    assert path.read_text(encoding="utf-8") == "新内容"
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_atomic_replace_keeps_original_on_error(tmp_path):
+    """Test a failed write leaves the original file untouched and removes the temp file"""
+    path = tmp_path / "digest.md"
+    path.write_text("old", encoding="utf-8")
+    
+    with pytest.raises(RuntimeError):
+        with atomic_replace(path):
+            raise RuntimeError("boom")
+    
+    assert path.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["digest.md"]
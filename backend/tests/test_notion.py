@@ -0,0 +1,66 @@
+"""Tests for Notion output"""
+import json
+import pytest
+from datetime import datetime
+
+pytest.importorskip("notion_client")
+
+import httpx
+from notion_client import APIResponseError
+
+from app.config import settings
+from app.outputs.base import Digest
+from app.outputs.notion import NotionOutput
+
+
+class _FakeNotion:
+    """Notion client whose database title property is named `title_name`"""
+    
+    def __init__(self, title_name: str):
+        self.created = []
+        self.pages = self
+        self.databases = self
+        self._title_name = title_name
+    
+    async def create(self, parent, properties, children):
+        self.created.append(list(properties))
+        if self._title_name not in properties:
+            raise APIResponseError(
+                code="validation_error",
+                status=400,
+                message="Title is not a property that exists.",
+                headers=httpx.Headers(),
+                raw_body_text="",
+            )
+        return {"id": "page-1"}
+    
+    async def retrieve(self, database_id):
+        return {"properties": {self._title_name: {"type": "title"}}}
+
+
+@pytest.fixture
+def digest():
+    return Digest(
+        run_id="run-1",
+        generated_at=datetime(2024, 1, 15, 10, 0),
+        window_start=datetime(2024, 1, 14, 10, 0),
+        window_end=datetime(2024, 1, 15, 10, 0),
+        items=[],
+    )
+
+
+async def test_stale_cached_title_property_is_redetected(tmp_path, monkeypatch, digest):
+    """Test a renamed title property drops the cache entry and retries once"""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+    cache_file = tmp_path / NotionOutput.TITLE_CACHE_FILE
+    cache_file.write_text(json.dumps({"db": "Name"}), encoding="utf-8")
+    
+    output = NotionOutput(token="secret", database_id="db")
+    fake = _FakeNotion(title_name="Title")
+    output._client = fake
+    
+    page_id = await output.deliver(digest)
+    
+    assert page_id == "page-1"
+    assert fake.created == [["Name"], ["Title"]]
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == {"db": "Title"}
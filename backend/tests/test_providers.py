@@ -0,0 +1,63 @@
+"""Tests for AI provider output parsing"""
+import json
+import pytest
+
+from app.providers import base
+from app.providers.base import BaseAIProvider, FASTJSONSCHEMA_AVAILABLE
+
+
+class _StubProvider(BaseAIProvider):
+    """Provider without an API, for exercising the shared parsing code"""
+    
+    async def _call_api(self, prompt: str, system: str = "", structured: bool = False):
+        raise NotImplementedError
+
+
+def _analysis_json(**overrides) -> str:
+    payload = {
+        "event_type": "earnings",
+        "impact_direction": "bullish",
+        "impact_horizon": "short",
+        "thesis_relation": "supports",
+        "confidence": "high",
+        "confidence_reason": "Reported figures",
+        "summary": "Record quarter",
+        "key_facts": ["Revenue up 20%"],
+        "watch_next": "Guidance",
+    }
+    payload.update(overrides)
+    return json.dumps(payload)
+
+
+@pytest.fixture
+def provider():
+    return _StubProvider()
+
+
+class TestParseAndValidate:
+    """Tests for BaseAIProvider._parse_and_validate"""
+    
+    def test_pydantic_path_truncates_long_fact(self, provider, monkeypatch):
+        """Test the Pydantic path cuts facts to 200 chars and keeps at most 3"""
+        monkeypatch.setattr(base, "_VALIDATE_ANALYSIS_FAST", None)
+        raw = _analysis_json(key_facts=["x" * 300, "b", "c", "d"])
+        
+        result = provider._parse_and_validate(raw)
+        
+        assert result.key_facts == ["x" * 200, "b", "c"]
+    
+    @pytest.mark.skipif(not FASTJSONSCHEMA_AVAILABLE, reason="fastjsonschema not installed")
+    @pytest.mark.parametrize("key_facts", [
+        ["x" * 300],
+        ["a", "b", "c", "d"],
+        ["x" * 200, "short"],
+    ])
+    def test_fast_and_pydantic_paths_agree(self, provider, monkeypatch, key_facts):
+        """Test the fastjsonschema path returns the same result as the Pydantic path"""
+        raw = _analysis_json(key_facts=key_facts)
+        
+        fast = provider._parse_and_validate(raw)
+        monkeypatch.setattr(base, "_VALIDATE_ANALYSIS_FAST", None)
+        slow = provider._parse_and_validate(raw)
+        
+        assert fast.model_dump() == slow.model_dump()
@@ -0,0 +1,28 @@
+"""Tests for the RPM/TPM token bucket"""
+import asyncio
+
+from app.utils.token_bucket import TokenBucket
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket.reserve under a penalty"""
+    
+    async def test_reserve_clamps_to_penalized_capacity(self):
+        """Test a request larger than the penalized cap is clamped instead of waiting"""
+        bucket = TokenBucket(rpm=6000, tpm=6000)
+        bucket.penalize(0.5, 3.0)
+        
+        reserved = await asyncio.wait_for(bucket.reserve(5000), timeout=1.0)
+        
+        assert reserved == 3000
+    
+    async def test_wait_is_capped_at_penalty_end(self):
+        """Test an empty bucket re-checks when the penalty expires rather than sleeping past it"""
+        bucket = TokenBucket(rpm=6000, tpm=6000)
+        await bucket.reserve(6000)
+        bucket.penalize(0.1, 0.2)
+        
+        # 6 s at the penalized rate, under 1 s once the penalty ends
+        reserved = await asyncio.wait_for(bucket.reserve(60), timeout=2.0)
+        
+        assert reserved == 60